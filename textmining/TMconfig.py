@@ -2,10 +2,14 @@
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
+from noun_filter import DEFAULT_DENY_PATTERNS
+
 @dataclass
 class AnalysisConfig:
     """분석 설정을 관리하는 클래스"""
     pdf_folder: str
+    pdf_files: Optional[Tuple[str, ...]] = None  # 지정하면 pdf_folder 대신 이 파일들만 분석
+    include_subfolders: bool = False  # 하위 폴더의 PDF도 분석 (폴더 이름 = 문서 라벨)
     font_path: str = "c:/Windows/Fonts/malgun.ttf"
     stopwords_file: Optional[str] = None
     output_dir: str = "./results"
@@ -14,14 +18,61 @@ class AnalysisConfig:
     char_limit: int = 50000000
     min_word_length: int = 2
     max_word_length: int = 15
+    deny_patterns: Tuple[str, ...] = DEFAULT_DENY_PATTERNS  # 제외할 명사 정규식
+    synonyms_file: Optional[str] = None  # 동의어/병합 사전 ("단어,대표어" 한 줄씩)
     min_word_freq: int = 3
     batch_size: int = 10000
     
+    # PDF 추출 설정
+    extract_workers: int = 1        # 페이지 구간을 추출할 프로세스 수 (1이면 현재 프로세스에서 추출)
+    pages_per_shard: int = 100      # 큰 문서를 나누는 페이지 구간 크기 (0이면 문서 단위)
+    
+    # 토큰 저장소 설정 (메모리 매핑된 id 스트림, 기본 위치: output_dir/token_store)
+    use_token_store: bool = False
+    token_store_dir: Optional[str] = None
+    reuse_token_store: bool = True
+    scan_chunk_size: int = 4194304
+    
     # 네트워크 설정
     window_size: int = 5
     min_edge_weight: int = 2
     
+    # 간선 테이블 최대 항목 수 (0이면 제한 없음) - 넘으면 약한 후보부터 버리는 근사 계산
+    edge_table_limit: int = 0
+    
+    # 간선 누적 메모리 예산 (MB, 0이면 제한 없음) - 넘으면 정렬된 부분 결과를 디스크로 내보낸 뒤 병합
+    # (정확한 계산, edge_table_limit과 함께 쓸 수 없음)
+    edge_memory_budget_mb: int = 0
+    spill_dir: Optional[str] = None  # 기본 위치: output_dir/edge_spill
+    
+    # 백본 추출 설정 ("disparity", "topk", "npmi" 또는 "disparity+topk"처럼 조합, None이면 사용 안 함)
+    backbone_method: Optional[str] = None
+    backbone_alpha: float = 0.05     # disparity filter 유의수준
+    backbone_top_k: int = 10         # 노드별 유지할 상위 간선 수
+    backbone_min_npmi: float = 0.0   # 유지할 최소 NPMI
+    backbone_compare_metrics: bool = False  # 원본 그래프로도 메트릭을 계산해 실제 속도 향상 측정 (그만큼 더 걸림)
+    
+    # 결과 저장 설정
+    build_network_index: bool = True  # output_dir/index에 키워드 조회용 인접 인덱스 저장
+    network_json_format: str = "json"  # 노드/간선 파일 형식: "json"(들여쓰기), "compact", "jsonl"
+    compress_network_files: bool = False  # network.gexf와 노드/간선 파일을 gzip(.gz)으로 저장
+    build_document_term_matrix: bool = True  # 문서 x 단어 희소 행렬과 TF-IDF 키워드 저장
+    tfidf_top_k: int = 50  # 저장할 TF-IDF 상위 키워드 수 (전체/라벨별)
+    
     # 시각화 설정
     max_nodes_display: int = 100
     figure_size: Tuple[int, int] = (20, 10)
     dpi: int = 300
+    
+    # 실행 설정
+    max_parallel_stages: int = 3  # 동시에 실행할 최대 단계 수 (1이면 순차 실행)
+    
+    def __post_init__(self):
+        self.validate()
+    
+    def validate(self):
+        """함께 쓸 수 없는 설정 조합 확인 (잘못되면 ValueError)"""
+        if self.edge_table_limit > 0 and self.edge_memory_budget_mb > 0:
+            raise ValueError("edge_table_limit and edge_memory_budget_mb cannot be combined: "
+                             "use edge_memory_budget_mb for exact counts within a memory budget, "
+                             "or edge_table_limit for approximate counts with a bounded table")
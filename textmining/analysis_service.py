@@ -0,0 +1,512 @@
+"""
+키워드 분석 로컬 서비스
+
+Okt(JVM)를 띄워둔 작업 스레드와 메모리에 올려둔 네트워크로 작은 분석 요청과
+네트워크 조회를 반복해서 처리한다. HTTP(TCP) 또는 Unix 소켓으로 실행할 수 있다.
+
+    python analysis_service.py --port 8765 --stopwords ./stopwords.txt
+    python analysis_service.py --unix-socket /tmp/textmining.sock
+
+엔드포인트
+    GET  /health                               상태, 대기 작업 수, 로드된 네트워크 (Okt 시작 실패 시 503)
+    POST /jobs                                 {"pdf_paths": [...]} 또는 {"pdf_folder": ...} + 설정 값
+    GET  /jobs/<job_id>                        작업 상태와 결과 요약
+    GET  /networks                             로드된 네트워크 목록
+    POST /networks/<name>                      {"path": "network.gexf"} 로드
+    GET  /networks/<name>/neighbors?word=&k=   가중치 상위 이웃
+"""
+
+import os
+import json
+import time
+import queue
+import socket
+import logging
+import argparse
+import threading
+import uuid
+import http.client
+from collections import OrderedDict
+from dataclasses import fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Any, Dict, List, Optional, Set, Tuple, Union, get_args, get_origin
+from urllib.parse import parse_qs, quote, urlparse
+
+import networkx as nx
+
+from TMconfig import AnalysisConfig
+from keyword_pdf_kor import EnhancedKeywordAnalyzer
+from token_store import file_fingerprint
+from build_cooccurrence_network import EnhancedCooccurrenceNetwork
+
+# 작업 요청으로 바꿀 수 없는 설정 (서버 환경에 묶인 값, pdf_files는 pdf_paths로 지정)
+FIXED_CONFIG_FIELDS = {"font_path", "output_dir", "token_store_dir", "spill_dir", "max_parallel_stages",
+                       "pdf_files"}
+
+
+class ServiceError(Exception):
+    """클라이언트에 HTTP 상태 코드와 함께 돌려줄 오류"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def coerce_config_value(name: str, value: Any, field_type: Any) -> Any:
+    """JSON 값을 AnalysisConfig 필드 타입으로 확인/변환 (맞지 않으면 400)"""
+    origin = get_origin(field_type)
+    if origin is Union:
+        # Optional[X]
+        if value is None:
+            return None
+        field_type = next(arg for arg in get_args(field_type) if arg is not type(None))
+        return coerce_config_value(name, value, field_type)
+    if origin is tuple:
+        args = get_args(field_type)
+        if isinstance(value, (list, tuple)):
+            if len(args) == 2 and args[1] is Ellipsis:
+                return tuple(coerce_config_value(name, item, args[0]) for item in value)
+            if len(value) == len(args):
+                return tuple(coerce_config_value(name, item, arg) for item, arg in zip(value, args))
+    elif field_type is bool:
+        if isinstance(value, bool):
+            return value
+    elif field_type is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif field_type is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif field_type is str:
+        if isinstance(value, str):
+            return value
+    raise ServiceError(400, f"Invalid value for {name}: {value!r}")
+
+
+class AnalysisJob:
+    def __init__(self, params: Dict):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = "queued"
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict:
+        return {'job_id': self.job_id, 'status': self.status, 'result': self.result, 'error': self.error}
+
+
+class AnalysisService:
+    """Okt를 띄워둔 작업 스레드, 제한된 작업 큐, 메모리 상주 네트워크를 관리"""
+
+    def __init__(self, config: AnalysisConfig, workers: int = 2, queue_size: int = 16,
+                 max_networks: int = 8, max_jobs: int = 1000):
+        self.config = config
+        self.jobs_queue: "queue.Queue[Optional[AnalysisJob]]" = queue.Queue(maxsize=queue_size)
+        self.jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self.networks: "OrderedDict[str, nx.Graph]" = OrderedDict()
+        self.max_networks = max_networks
+        self.max_jobs = max_jobs
+        self.workers = max(workers, 1)
+        self.startup_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stopwords_cache: Dict[str, Tuple[Tuple, Set[str]]] = {}
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """작업 스레드마다 쓸 Okt를 현재(메인) 스레드에서 차례로 띄운 뒤 스레드를 시작
+
+        JVM 부팅은 동시에 하면 안전하지 않으므로 스레드 안에서 Okt를 만들지 않는다.
+        Okt를 띄우지 못하면 서비스를 비정상(/health 503)으로 표시하고 대기 작업을 실패 처리한다.
+        """
+        okts = []
+        try:
+            for _ in range(self.workers):
+                okt = EnhancedKeywordAnalyzer(self.config).okt
+                okt.nouns("워밍업")
+                okts.append(okt)
+        except Exception as e:
+            self.startup_error = f"Okt startup failed: {e}"
+            logging.error(self.startup_error)
+            self._fail_queued_jobs(self.startup_error)
+            return
+
+        for i, okt in enumerate(okts):
+            thread = threading.Thread(target=self._worker_loop, args=(okt,), name=f"analysis-worker-{i}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self.jobs_queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _fail_queued_jobs(self, error: str):
+        while True:
+            try:
+                job = self.jobs_queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is not None:
+                job.error = error
+                job.status = "failed"
+                job.done.set()
+
+    # ---- 작업 처리 ----
+
+    def submit(self, params: Dict) -> AnalysisJob:
+        """작업을 큐에 넣는다 (큐가 가득 찼거나 Okt를 띄우지 못했으면 503)"""
+        if self.startup_error:
+            raise ServiceError(503, self.startup_error)
+        self.job_config(params)  # 잘못된 설정은 큐에 넣기 전에 거절
+        job = AnalysisJob(params)
+        with self._lock:
+            self.jobs[job.job_id] = job
+            while len(self.jobs) > self.max_jobs:
+                self.jobs.popitem(last=False)
+        try:
+            self.jobs_queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.jobs.pop(job.job_id, None)
+            raise ServiceError(503, "Job queue is full")
+        return job
+
+    def get_job(self, job_id: str) -> AnalysisJob:
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"Unknown job: {job_id}")
+        return job
+
+    def job_config(self, params: Dict) -> AnalysisConfig:
+        """요청 값으로 기본 설정을 덮어쓴 작업 설정"""
+        overrides = {key: value for key, value in params.items() if key not in ("pdf_paths", "metrics")}
+        allowed = {f.name for f in fields(AnalysisConfig)} - FIXED_CONFIG_FIELDS
+        unknown = set(overrides) - allowed
+        if unknown:
+            raise ServiceError(400, f"Unknown or fixed config fields: {sorted(unknown)}")
+        field_types = {f.name: f.type for f in fields(AnalysisConfig)}
+        overrides = {key: coerce_config_value(key, value, field_types[key]) for key, value in overrides.items()}
+        if "pdf_paths" in params:
+            # 빈 목록은 pdf_files=None(폴더 전체 분석)과 구분되지 않으므로 거절
+            pdf_paths = params["pdf_paths"]
+            if not isinstance(pdf_paths, list) or not pdf_paths \
+                    or not all(isinstance(path, str) for path in pdf_paths):
+                raise ServiceError(400, "pdf_paths must be a non-empty list of paths")
+            overrides["pdf_files"] = tuple(pdf_paths)
+        elif "pdf_folder" not in params:
+            raise ServiceError(400, "Either pdf_paths or pdf_folder is required")
+        # 작업마다 토큰 저장소가 섞이지 않도록 저장소는 사용하지 않는다
+        overrides["use_token_store"] = False
+        try:
+            return replace(self.config, **overrides)
+        except ValueError as e:
+            # AnalysisConfig.validate()가 거절한 조합
+            raise ServiceError(400, str(e))
+
+    def stopwords_for(self, config: AnalysisConfig) -> Set[str]:
+        """불용어는 파일별로 한 번만 로드 (파일이 바뀌면(크기/수정 시각) 다시 로드)"""
+        key = os.path.abspath(config.stopwords_file) if config.stopwords_file else ""
+        signature = tuple(file_fingerprint(config.stopwords_file) or ())
+        with self._lock:
+            cached = self._stopwords_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        stopwords = EnhancedKeywordAnalyzer(config).load_stopwords(config.stopwords_file)
+        with self._lock:
+            self._stopwords_cache[key] = (signature, stopwords)
+        return stopwords
+
+    def _worker_loop(self, okt):
+        # start()에서 띄워 둔 Okt를 스레드마다 하나씩 재사용
+        logging.info(f"{threading.current_thread().name} ready")
+
+        while True:
+            job = self.jobs_queue.get()
+            if job is None:
+                return
+            job.status = "running"
+            try:
+                job.result = self.run_job(job, okt)
+                job.status = "done"
+            except Exception as e:
+                logging.error(f"Job {job.job_id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.done.set()
+
+    def run_job(self, job: AnalysisJob, okt) -> Dict:
+        config = self.job_config(job.params)
+        analyzer = EnhancedKeywordAnalyzer(config, okt=okt, stopwords=self.stopwords_for(config))
+        nouns, freq = analyzer.analyze()
+
+        network_analyzer = EnhancedCooccurrenceNetwork(config)
+        G = network_analyzer.build_cooccurrence_network(nouns)
+        self.put_network(job.job_id, G)
+
+        result = {
+            'network': job.job_id,
+            'tokens': len(nouns),
+            'unique_keywords': len(freq),
+            'top_keywords': freq.most_common(20),
+            'nodes': G.number_of_nodes(),
+            'edges': G.number_of_edges(),
+        }
+        if job.params.get("metrics"):
+            metrics = network_analyzer.calculate_network_metrics(G)
+            metrics.pop('centrality', None)
+            result['metrics'] = metrics
+        return result
+
+    # ---- 네트워크 조회 ----
+
+    def put_network(self, name: str, G: nx.Graph):
+        """네트워크를 메모리에 올린다 (max_networks를 넘으면 가장 오래 안 쓴 것부터 내림)"""
+        with self._lock:
+            self.networks[name] = G
+            self.networks.move_to_end(name)
+            while len(self.networks) > self.max_networks:
+                self.networks.popitem(last=False)
+
+    def load_network(self, name: str, path: str) -> nx.Graph:
+        if not os.path.exists(path):
+            raise ServiceError(404, f"Network file not found: {path}")
+        G = nx.read_gexf(path)
+        self.put_network(name, G)
+        return G
+
+    def get_network(self, name: str) -> nx.Graph:
+        with self._lock:
+            G = self.networks.get(name)
+            if G is not None:
+                self.networks.move_to_end(name)
+        if G is None:
+            raise ServiceError(404, f"Unknown network: {name}")
+        return G
+
+    def neighbors(self, name: str, word: str, k: int = 10) -> List[Dict]:
+        G = self.get_network(name)
+        if word not in G:
+            raise ServiceError(404, f"Unknown keyword: {word}")
+        ranked = sorted(G[word].items(), key=lambda item: item[1].get('weight', 0), reverse=True)[:k]
+        return [{'word': neighbor, 'weight': data.get('weight', 0)} for neighbor, data in ranked]
+
+    def health(self) -> Dict:
+        with self._lock:
+            networks = list(self.networks)
+        health = {'status': 'unhealthy' if self.startup_error else 'ok', 'queued': self.jobs_queue.qsize(),
+                  'workers': len(self._threads), 'networks': networks}
+        if self.startup_error:
+            health['error'] = self.startup_error
+        return health
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    server_version = "TextMiningService/1.0"
+
+    @property
+    def service(self) -> AnalysisService:
+        return self.server.service
+
+    def address_string(self) -> str:
+        # Unix 소켓 연결은 클라이언트 주소가 없다
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            payload = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            raise ServiceError(400, "Invalid JSON body")
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "JSON body must be an object")
+        return payload
+
+    @staticmethod
+    def _query_k(query: Dict[str, str]) -> int:
+        try:
+            k = int(query.get("k", 10))
+        except ValueError:
+            raise ServiceError(400, f"k must be an integer: {query['k']}")
+        if k < 1:
+            raise ServiceError(400, f"k must be at least 1: {k}")
+        return k
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if method == "GET" and parts == ["health"]:
+                health = self.service.health()
+                return self._send_json(200 if health['status'] == 'ok' else 503, health)
+            if method == "POST" and parts == ["jobs"]:
+                job = self.service.submit(self._read_json())
+                return self._send_json(202, job.to_dict())
+            if method == "GET" and len(parts) == 2 and parts[0] == "jobs":
+                return self._send_json(200, self.service.get_job(parts[1]).to_dict())
+            if method == "GET" and parts == ["networks"]:
+                return self._send_json(200, self.service.health()['networks'])
+            if method == "POST" and len(parts) == 2 and parts[0] == "networks":
+                G = self.service.load_network(parts[1], self._read_json().get("path", ""))
+                return self._send_json(200, {'network': parts[1], 'nodes': G.number_of_nodes(),
+                                             'edges': G.number_of_edges()})
+            if method == "GET" and len(parts) == 3 and parts[0] == "networks" and parts[2] == "neighbors":
+                neighbors = self.service.neighbors(parts[1], query.get("word", ""), self._query_k(query))
+                return self._send_json(200, neighbors)
+            raise ServiceError(404, f"Not found: {method} {url.path}")
+        except ServiceError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            logging.error(f"Request failed: {e}")
+            self._send_json(500, {'error': str(e)})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: AnalysisService):
+        super().__init__(address, ServiceRequestHandler)
+        self.service = service
+
+
+class ServiceUnixServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: AnalysisService):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, ServiceRequestHandler)
+        self.service = service
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class AnalysisClient:
+    """서비스용 로컬 클라이언트 (TCP 또는 Unix 소켓)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765,
+                 unix_socket: Optional[str] = None, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload: Dict = None):
+        if self.unix_socket:
+            conn = _UnixHTTPConnection(self.unix_socket, self.timeout)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = json.loads(response.read().decode('utf-8'))
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise ServiceError(response.status, data.get('error', ''))
+        return data
+
+    def health(self) -> Dict:
+        return self._request("GET", "/health")
+
+    def submit_job(self, pdf_paths: List[str] = None, **params) -> str:
+        if pdf_paths is not None:
+            params["pdf_paths"] = list(pdf_paths)
+        return self._request("POST", "/jobs", params)['job_id']
+
+    def job(self, job_id: str) -> Dict:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def wait_job(self, job_id: str, poll_interval: float = 0.2, timeout: float = 600.0) -> Dict:
+        """작업이 끝날 때까지 폴링"""
+        waited = 0.0
+        while True:
+            job = self.job(job_id)
+            if job['status'] in ("done", "failed") or waited >= timeout:
+                return job
+            time.sleep(poll_interval)
+            waited += poll_interval
+
+    def load_network(self, name: str, path: str) -> Dict:
+        return self._request("POST", f"/networks/{name}", {'path': os.path.abspath(path)})
+
+    def networks(self) -> List[str]:
+        return self._request("GET", "/networks")
+
+    def neighbors(self, name: str, word: str, k: int = 10) -> List[Dict]:
+        return self._request("GET", f"/networks/{name}/neighbors?word={quote(word)}&k={k}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="키워드 분석 로컬 서비스")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", help="TCP 대신 사용할 Unix 소켓 경로")
+    parser.add_argument("--workers", type=int, default=2, help="Okt 작업 스레드 수")
+    parser.add_argument("--queue-size", type=int, default=16, help="대기 가능한 최대 작업 수")
+    parser.add_argument("--max-networks", type=int, default=8, help="메모리에 유지할 최대 네트워크 수")
+    parser.add_argument("--pdf-folder", default=".", help="작업에 pdf_folder가 없을 때의 기본 폴더")
+    parser.add_argument("--font-path", default=AnalysisConfig.font_path)
+    parser.add_argument("--stopwords", help="기본 불용어 파일")
+    parser.add_argument("--output-dir", default="./service_results")
+    args = parser.parse_args()
+
+    config = AnalysisConfig(pdf_folder=args.pdf_folder, font_path=args.font_path,
+                            stopwords_file=args.stopwords, output_dir=args.output_dir)
+    service = AnalysisService(config, args.workers, args.queue_size, args.max_networks)
+    service.start()
+
+    if args.unix_socket:
+        server = ServiceUnixServer(args.unix_socket, service)
+        logging.info(f"Serving on unix socket {args.unix_socket}")
+    else:
+        server = ServiceHTTPServer((args.host, args.port), service)
+        logging.info(f"Serving on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
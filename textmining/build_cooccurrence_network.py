@@ -1,19 +1,24 @@
 
 import networkx as nx
-from collections import Counter
-from itertools import combinations
 import community
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple, Union
 import json
 import os
 import logging
 from TMconfig import AnalysisConfig
+from token_stream import TokenStream
+from edge_counting import (BoundedCountTable, CountTable, SpillingCountTable, decode_pair_keys,
+                           fill_window_pair_table)
+from network_index import build_network_index
+from network_writers import (JSON_RECORD_EXTENSIONS, json_records_path, remove_stale_outputs, write_graph_gexf,
+                             write_json_records)
 import matplotlib
 matplotlib.use('Agg')  # GUI 없이 이미지 생성용
 
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
+from matplotlib.figure import Figure
 
 font_path = 'c:/Windows/Fonts/malgun.ttf'  # 사용하시는 한글 폰트 경로
 font_prop = fm.FontProperties(fname=font_path)
@@ -25,31 +30,45 @@ class EnhancedCooccurrenceNetwork:
     def __init__(self, config: AnalysisConfig):
         self.config = config
     
-    def build_cooccurrence_network(self, words: List[str]) -> nx.Graph:
+    def build_cooccurrence_network(self, words: Union[TokenStream, List[str]]) -> nx.Graph:
         """향상된 공동출현 네트워크 생성"""
-        frequencies = Counter(words)
-        G = nx.Graph()
+        if not isinstance(words, TokenStream):
+            words = TokenStream.from_words(words)
+        
+        vocab = words.vocab
+        
+        # 빈도가 낮은 단어 미리 제거 (빈도는 analyze()에서 센 값을 TokenStream이 캐시)
+        frequencies = words.counts(self.config.scan_chunk_size)
+        keep = frequencies >= max(self.config.min_word_freq, 1)
+        node_ids = np.flatnonzero(keep)
+        node_freqs = frequencies[node_ids]
+        
+        # 공동출현 계산 (살아남은 id만 청크 단위로 스캔하는 벡터화 버전)
+        edge_table = self.new_edge_table()
+        edge_table = fill_window_pair_table(
+            words.iter_chunks(edge_table.scan_chunk(self.config.scan_chunk_size)), keep,
+            self.config.window_size, len(vocab), edge_table)
+        logging.info(f"{len(node_ids)} of {len(vocab)} words reached min_word_freq")
+        self.log_edge_table(edge_table)
         
-        # 빈도가 낮은 단어 미리 제거
-        filtered_words = [word for word in words if frequencies[word] >= self.config.min_word_freq]
+        # 간선 추가 (디스크로 내보낸 run이 있으면 키 구간 블록 단위로 병합하며 추가)
+        return self.graph_from_counts(vocab, node_ids, node_freqs,
+                                      edge_table.iter_result(self.config.min_edge_weight))
+    
+    def graph_from_counts(self, vocab: List[str], node_ids: np.ndarray, node_freqs: np.ndarray,
+                          edge_blocks: Iterable[Tuple[np.ndarray, np.ndarray]]) -> nx.Graph:
+        """단어 빈도와 (간선 키, 가중치) 블록으로 그래프 생성 (간선은 min_edge_weight 적용 후)"""
+        G = nx.Graph()
         
         # 노드 추가
-        for word in set(filtered_words):
-            G.add_node(word, freq=frequencies[word])
-        
-        # 공동출현 계산 (최적화된 버전)
-        edge_weights = {}
-        for i in range(len(filtered_words) - self.config.window_size + 1):
-            window = set(filtered_words[i:i + self.config.window_size])
-            for w1, w2 in combinations(window, 2):
-                if w1 != w2:
-                    edge = tuple(sorted([w1, w2]))
-                    edge_weights[edge] = edge_weights.get(edge, 0) + 1
+        for word_id, freq in zip(node_ids.tolist(), node_freqs.tolist()):
+            G.add_node(vocab[word_id], freq=freq)
         
         # 간선 추가
-        for (w1, w2), weight in edge_weights.items():
-            if weight >= self.config.min_edge_weight:
-                G.add_edge(w1, w2, weight=weight)
+        for edge_keys, edge_weights in edge_blocks:
+            id1, id2 = decode_pair_keys(edge_keys, len(vocab))
+            G.add_weighted_edges_from(zip(
+                [vocab[w] for w in id1.tolist()], [vocab[w] for w in id2.tolist()], edge_weights.tolist()))
         
         # 고립된 노드 제거
         isolated_nodes = [node for node in G.nodes() if G.degree(node) == 0]
@@ -58,6 +77,33 @@ class EnhancedCooccurrenceNetwork:
         logging.info(f"Network created: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
         return G
     
+    def new_edge_table(self) -> CountTable:
+        """간선 빈도 테이블
+
+        edge_table_limit이 있으면 항목 수 상한 테이블(근사), edge_memory_budget_mb가 있으면
+        디스크로 내보내는 테이블(정확), 둘 다 없으면 메모리 테이블. 두 설정은 함께 쓸 수 없다.
+        """
+        config = self.config
+        config.validate()
+        if config.edge_table_limit > 0:
+            return BoundedCountTable(config.edge_table_limit, config.min_edge_weight)
+        if config.edge_memory_budget_mb > 0:
+            spill_dir = config.spill_dir or os.path.join(config.output_dir, "edge_spill")
+            return SpillingCountTable(config.edge_memory_budget_mb * 1024 * 1024, spill_dir)
+        return CountTable()
+    
+    def log_edge_table(self, edge_table: CountTable):
+        """상한 테이블에서 가지치기가 일어났으면 근사 정도와 잘린 간선을 알린다"""
+        if not isinstance(edge_table, BoundedCountTable) or not edge_table.pruned_entries:
+            return
+        logging.info(f"Edge table limit: pruned {edge_table.pruned_entries} edge candidates "
+                     f"(kept weights may be undercounted by up to "
+                     f"{edge_table.max_undercount(self.config.min_edge_weight)})")
+        if edge_table.pruned_strong_entries:
+            logging.warning(f"edge_table_limit={self.config.edge_table_limit} dropped "
+                            f"{edge_table.pruned_strong_entries} edge candidates that had already reached "
+                            f"min_edge_weight; the network is truncated, raise edge_table_limit for all edges")
+    
     def calculate_network_metrics(self, G: nx.Graph) -> Dict:
         """네트워크 분석 메트릭 계산"""
         if G.number_of_nodes() == 0:
@@ -88,28 +134,39 @@ class EnhancedCooccurrenceNetwork:
     
     def save_network_results(self, G: nx.Graph, metrics: Dict, output_dir: str):
         """네트워크 분석 결과 저장"""
+        self.save_graph_files(G, output_dir)
+        self.save_metrics(metrics, output_dir)
+    
+    def save_graph_files(self, G: nx.Graph, output_dir: str):
+        """그래프(GEXF)와 노드/간선 JSON 저장 (노드/간선을 순회하며 바로 기록)"""
         os.makedirs(output_dir, exist_ok=True)
+        compress = self.config.compress_network_files
+        json_format = self.config.network_json_format
         
-        # 그래프 저장
-        nx.write_gexf(G, os.path.join(output_dir, "network.gexf"))
+        # 그래프 저장 (XML 트리 없이 스트리밍, 결과는 nx.write_gexf와 동일)
+        gexf_path = os.path.join(output_dir, "network.gexf.gz" if compress else "network.gexf")
+        write_graph_gexf(G, gexf_path)
+        remove_stale_outputs(gexf_path, "network", (".gexf", ".gexf.gz"))
         
         # 노드 정보 저장
-        nodes_data = []
-        for node in G.nodes(data=True):
-            node_info = {'name': node[0], 'freq': node[1].get('freq', 0)}
-            nodes_data.append(node_info)
-        
-        with open(os.path.join(output_dir, "nodes.json"), 'w', encoding='utf-8') as f:
-            json.dump(nodes_data, f, ensure_ascii=False, indent=2)
+        nodes_path = json_records_path(output_dir, "nodes", json_format, compress)
+        write_json_records(nodes_path, ({'name': node, 'freq': data.get('freq', 0)}
+                                        for node, data in G.nodes(data=True)), json_format)
+        remove_stale_outputs(nodes_path, "nodes", JSON_RECORD_EXTENSIONS)
         
         # 간선 정보 저장
-        edges_data = []
-        for edge in G.edges(data=True):
-            edge_info = {'source': edge[0], 'target': edge[1], 'weight': edge[2].get('weight', 0)}
-            edges_data.append(edge_info)
+        edges_path = json_records_path(output_dir, "edges", json_format, compress)
+        write_json_records(edges_path, ({'source': u, 'target': v, 'weight': data.get('weight', 0)}
+                                        for u, v, data in G.edges(data=True)), json_format)
+        remove_stale_outputs(edges_path, "edges", JSON_RECORD_EXTENSIONS)
         
-        with open(os.path.join(output_dir, "edges.json"), 'w', encoding='utf-8') as f:
-            json.dump(edges_data, f, ensure_ascii=False, indent=2)
+        # 키워드 중심 조회용 인접 인덱스 저장
+        if self.config.build_network_index:
+            build_network_index(G, os.path.join(output_dir, "index"))
+    
+    def save_metrics(self, metrics: Dict, output_dir: str):
+        """메트릭과 중심성 지표 저장"""
+        os.makedirs(output_dir, exist_ok=True)
         
         # 메트릭 저장
         save_metrics = metrics.copy()
@@ -141,7 +198,9 @@ class EnhancedCooccurrenceNetwork:
             G = G.subgraph(top_nodes).copy()
             logging.info(f"Network reduced to top {len(top_nodes)} nodes")
         
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=self.config.figure_size)
+        # pyplot 전역 상태를 쓰지 않는 Figure를 사용해 다른 단계와 동시에 그려도 안전하게 한다
+        fig = Figure(figsize=self.config.figure_size)
+        ax1, ax2 = fig.subplots(1, 2)
         
         font_prop = fm.FontProperties(fname=self.config.font_path) if os.path.exists(self.config.font_path) else None
         
@@ -229,10 +288,8 @@ class EnhancedCooccurrenceNetwork:
             
             ax2.axis('off')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if output_path:
-            plt.savefig(output_path, dpi=self.config.dpi, bbox_inches='tight')
+            fig.savefig(output_path, dpi=self.config.dpi, bbox_inches='tight')
             logging.info(f"Network visualization saved to {output_path}")
-        
-        plt.show()
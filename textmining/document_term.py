@@ -0,0 +1,158 @@
+import os
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from token_stream import DEFAULT_SCAN_CHUNK, TokenStream
+
+# 결과 폴더에 저장되는 파일
+MATRIX_FILE = "dtm.npz"
+VOCAB_FILE = "dtm_vocab.txt"
+DOCUMENTS_FILE = "dtm_documents.json"
+KEYWORDS_FILE = "tfidf_keywords.json"
+
+
+def document_label(doc_name: str) -> str:
+    """문서 라벨: 하위 폴더에 있으면 첫 폴더 이름 (예: "HRD/jd1.pdf" -> "HRD"), 아니면 문서 이름"""
+    parts = doc_name.replace('\\', '/').split('/')
+    return parts[0] if len(parts) > 1 else doc_name
+
+
+class DocumentTermMatrix:
+    """문서 x 단어 빈도 희소 행렬과 TF-IDF 기반 키워드 순위"""
+
+    def __init__(self, matrix: sparse.csr_matrix, vocab: List[str], doc_names: List[str],
+                 labels: Optional[List[str]] = None):
+        self.matrix = matrix
+        self.vocab = vocab
+        self.doc_names = doc_names
+        self.labels = labels if labels is not None else [document_label(name) for name in doc_names]
+
+    @classmethod
+    def from_tokens(cls, tokens: TokenStream, chunk_size: int = DEFAULT_SCAN_CHUNK) -> "DocumentTermMatrix":
+        """토큰 스트림을 한 번 스캔해 문서별 단어 빈도 행렬 생성 (문서 경계는 doc_offsets)
+
+        청크마다 (문서, 단어) 빈도를 합산한 COO 조각만 모아 두고 마지막에 한 번 CSR로 바꾼다
+        (청크 경계에 걸친 문서의 항목은 이때 합산된다).
+        """
+        n_docs = len(tokens.doc_offsets) - 1
+        shape = (n_docs, len(tokens.vocab))
+        rows_parts, cols_parts, data_parts = [], [], []
+        for start in range(0, len(tokens), chunk_size):
+            ids = np.asarray(tokens.ids[start:start + chunk_size])
+            positions = np.arange(start, start + len(ids))
+            rows = np.searchsorted(tokens.doc_offsets, positions, side='right') - 1
+            # coo -> csr 변환 시 청크 안의 같은 (문서, 단어) 항목이 합산된다
+            part = sparse.coo_matrix((np.ones(len(ids), dtype=np.int64), (rows, ids)), shape=shape).tocsr().tocoo()
+            rows_parts.append(part.row)
+            cols_parts.append(part.col)
+            data_parts.append(part.data)
+
+        if data_parts:
+            matrix = sparse.coo_matrix((np.concatenate(data_parts),
+                                        (np.concatenate(rows_parts), np.concatenate(cols_parts))),
+                                       shape=shape).tocsr()
+        else:
+            matrix = sparse.csr_matrix(shape, dtype=np.int64)
+
+        doc_names = list(tokens.doc_names) or [""] * n_docs
+        logging.info(f"Document-term matrix: {n_docs} documents x {len(tokens.vocab)} words, {matrix.nnz} nonzeros")
+        return cls(matrix, tokens.vocab, doc_names)
+
+    def document_frequency(self) -> np.ndarray:
+        """단어별 등장 문서 수"""
+        return np.bincount(self.matrix.indices, minlength=self.matrix.shape[1])
+
+    def tfidf(self) -> sparse.csr_matrix:
+        """문서 길이로 정규화한 TF x 평활 IDF (긴 문서가 순위를 독점하지 않도록)"""
+        n_docs = self.matrix.shape[0]
+        doc_lengths = np.asarray(self.matrix.sum(axis=1)).ravel().astype(np.float64)
+        inv_lengths = np.divide(1.0, doc_lengths, out=np.zeros_like(doc_lengths), where=doc_lengths > 0)
+        idf = np.log((1 + n_docs) / (1 + self.document_frequency())) + 1
+        return (sparse.diags(inv_lengths) @ self.matrix.astype(np.float64) @ sparse.diags(idf)).tocsr()
+
+    @staticmethod
+    def _mean_scores(tfidf: sparse.csr_matrix) -> np.ndarray:
+        """문서 평균 TF-IDF (문서가 없으면 0, scipy mean은 0행에서 ZeroDivisionError)"""
+        if tfidf.shape[0] == 0:
+            return np.zeros(tfidf.shape[1])
+        return np.asarray(tfidf.mean(axis=0)).ravel()
+
+    @staticmethod
+    def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, np.count_nonzero(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def top_keywords(self, k: int = 50, tfidf: sparse.csr_matrix = None) -> List[Tuple[str, float]]:
+        """문서 평균 TF-IDF 상위 키워드"""
+        if tfidf is None:
+            tfidf = self.tfidf()
+        scores = self._mean_scores(tfidf)
+        return [(self.vocab[i], float(scores[i])) for i in self._top_k_indices(scores, k)]
+
+    def top_keywords_by_label(self, k: int = 20,
+                              tfidf: sparse.csr_matrix = None) -> Dict[str, List[Tuple[str, float]]]:
+        """라벨별 문서 평균 TF-IDF 상위 키워드"""
+        if tfidf is None:
+            tfidf = self.tfidf()
+        label_names, label_index = np.unique(np.array(self.labels, dtype=object), return_inverse=True)
+        n_docs = self.matrix.shape[0]
+        membership = sparse.csr_matrix((np.ones(n_docs), (label_index, np.arange(n_docs))),
+                                       shape=(len(label_names), n_docs))
+        label_sizes = np.asarray(membership.sum(axis=1)).ravel()
+        label_scores = (sparse.diags(1.0 / label_sizes) @ membership @ tfidf).tocsr()
+
+        ranked = {}
+        for i, label in enumerate(label_names):
+            scores = label_scores.getrow(i).toarray().ravel()
+            ranked[str(label)] = [(self.vocab[j], float(scores[j])) for j in self._top_k_indices(scores, k)]
+        return ranked
+
+    def has_folder_labels(self) -> bool:
+        """문서 이름과 다른 라벨(하위 폴더 이름)이 하나라도 있는지"""
+        return any(label != name for name, label in zip(self.doc_names, self.labels))
+
+    def save(self, output_dir: str, k: int = 50):
+        """행렬, 어휘, 문서 정보와 TF-IDF 키워드 순위 저장"""
+        os.makedirs(output_dir, exist_ok=True)
+        sparse.save_npz(os.path.join(output_dir, MATRIX_FILE), self.matrix)
+        with open(os.path.join(output_dir, VOCAB_FILE), 'w', encoding='utf-8') as f:
+            for word in self.vocab:
+                f.write(word + '\n')
+
+        doc_lengths = np.asarray(self.matrix.sum(axis=1)).ravel()
+        documents = [{'name': name, 'label': label, 'tokens': int(length)}
+                     for name, label, length in zip(self.doc_names, self.labels, doc_lengths)]
+        with open(os.path.join(output_dir, DOCUMENTS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(documents, f, ensure_ascii=False, indent=2)
+
+        tfidf = self.tfidf()
+        df = self.document_frequency()
+        scores = self._mean_scores(tfidf)
+        keywords = {
+            'tfidf': [{'word': self.vocab[i], 'score': float(scores[i]), 'df': int(df[i])}
+                      for i in self._top_k_indices(scores, k)],
+        }
+        # 라벨이 모두 문서 이름이면 라벨별 순위는 문서별 순위라 문서 수만큼 커지기만 하므로 생략
+        if self.has_folder_labels():
+            keywords['by_label'] = {label: [{'word': word, 'score': score} for word, score in ranked]
+                                    for label, ranked in self.top_keywords_by_label(k, tfidf).items()}
+        with open(os.path.join(output_dir, KEYWORDS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(keywords, f, ensure_ascii=False, indent=2)
+        logging.info(f"Document-term matrix and TF-IDF keywords saved to {output_dir}")
+
+    @classmethod
+    def load(cls, output_dir: str) -> "DocumentTermMatrix":
+        """save로 저장한 행렬 다시 읽기"""
+        matrix = sparse.load_npz(os.path.join(output_dir, MATRIX_FILE)).tocsr()
+        with open(os.path.join(output_dir, VOCAB_FILE), 'r', encoding='utf-8') as f:
+            vocab = [line.rstrip('\n') for line in f]
+        with open(os.path.join(output_dir, DOCUMENTS_FILE), 'r', encoding='utf-8') as f:
+            documents = json.load(f)
+        return cls(matrix, vocab, [d['name'] for d in documents], [d['label'] for d in documents])
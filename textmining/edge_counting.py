@@ -0,0 +1,341 @@
+import os
+import shutil
+import logging
+import tempfile
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# 간선은 (id1, id2) 쌍을 id1 * n_vocab + id2 형태의 int64 키로 압축해 다룬다 (id1 < id2)
+KEY_DTYPE = np.int64
+COUNT_DTYPE = np.int64
+
+# 한 번에 처리할 윈도우 수 (window_size=5 기준 청크당 임시 메모리 약 110MB)
+DEFAULT_WINDOW_CHUNK = 1 << 18
+# 윈도우 쌍 하나당 window_pair_keys + reduce_counts의 최대 임시 메모리 (측정값 약 40~50바이트)
+WINDOW_PAIR_BYTES = 64
+# 스캔 청크의 토큰 하나당 임시 메모리 (keep 마스크, 필터링 결과, 직전 꼬리를 이은 버퍼)
+SCAN_TOKEN_BYTES = 16
+# run 병합 때 키 + 빈도 한 쌍의 크기
+MERGE_ENTRY_BYTES = 16
+
+
+def empty_counts() -> Tuple[np.ndarray, np.ndarray]:
+    return np.zeros(0, dtype=KEY_DTYPE), np.zeros(0, dtype=COUNT_DTYPE)
+
+
+def encode_pair_keys(id1: np.ndarray, id2: np.ndarray, n_vocab: int) -> np.ndarray:
+    """(id1, id2) 쌍을 정렬된 int64 키로 변환"""
+    id1 = id1.astype(KEY_DTYPE, copy=False)
+    id2 = id2.astype(KEY_DTYPE, copy=False)
+    return np.minimum(id1, id2) * n_vocab + np.maximum(id1, id2)
+
+
+def decode_pair_keys(keys: np.ndarray, n_vocab: int) -> Tuple[np.ndarray, np.ndarray]:
+    """int64 키를 (id1, id2) 쌍으로 복원"""
+    return keys // n_vocab, keys % n_vocab
+
+
+def reduce_counts(keys: np.ndarray, counts: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """중복 키의 빈도를 합산해 정렬된 (keys, counts) 반환"""
+    if len(keys) == 0:
+        return empty_counts()
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    if counts is None:
+        summed = np.bincount(inverse, minlength=len(unique_keys))
+    else:
+        summed = np.bincount(inverse, weights=counts, minlength=len(unique_keys))
+    return unique_keys, summed.astype(COUNT_DTYPE)
+
+
+def merge_counts(parts: Iterable[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """여러 (keys, counts) 결과를 하나로 병합"""
+    parts = [part for part in parts if len(part[0])]
+    if not parts:
+        return empty_counts()
+    if len(parts) == 1:
+        return parts[0]
+    keys = np.concatenate([k for k, _ in parts])
+    counts = np.concatenate([c for _, c in parts])
+    return reduce_counts(keys, counts)
+
+
+def window_pair_keys(ids: np.ndarray, window_size: int, n_vocab: int) -> np.ndarray:
+    """각 윈도우에 함께 등장한 서로 다른 단어 쌍의 키 (윈도우당 쌍은 1회만)"""
+    n_windows = len(ids) - window_size + 1
+    if window_size < 2 or n_windows <= 0:
+        return np.zeros(0, dtype=KEY_DTYPE)
+
+    windows = np.lib.stride_tricks.sliding_window_view(ids, window_size)[:n_windows]
+    left, right = np.triu_indices(window_size, k=1)
+    a = windows[:, left]
+    b = windows[:, right]
+    keys = encode_pair_keys(a, b, n_vocab)
+    keys[a == b] = -1
+
+    # 윈도우 안에서 같은 쌍이 여러 번 나와도 한 번만 센다 (set 기반 기존 로직과 동일)
+    keys.sort(axis=1)
+    distinct = np.empty(keys.shape, dtype=bool)
+    distinct[:, 0] = True
+    np.not_equal(keys[:, 1:], keys[:, :-1], out=distinct[:, 1:])
+    distinct &= keys >= 0
+    return keys[distinct]
+
+
+def iter_window_pair_counts(ids: np.ndarray, window_size: int, n_vocab: int,
+                            chunk_windows: int = DEFAULT_WINDOW_CHUNK) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """id 시퀀스의 슬라이딩 윈도우 공동출현 빈도를 chunk_windows개 윈도우마다 (keys, counts)로 순회"""
+    n_windows = len(ids) - window_size + 1
+    for start in range(0, max(n_windows, 0), chunk_windows):
+        stop = min(start + chunk_windows, n_windows)
+        chunk = ids[start:stop + window_size - 1]
+        yield reduce_counts(window_pair_keys(chunk, window_size, n_vocab))
+
+
+def count_window_pairs(ids: np.ndarray, window_size: int, n_vocab: int,
+                       chunk_windows: int = DEFAULT_WINDOW_CHUNK) -> Tuple[np.ndarray, np.ndarray]:
+    """id 시퀀스의 슬라이딩 윈도우 공동출현 빈도를 청크 단위로 계산"""
+    return merge_counts(list(iter_window_pair_counts(ids, window_size, n_vocab, chunk_windows)))
+
+
+class CountTable:
+    """정렬된 (keys, counts) 배열로 빈도를 누적하는 테이블"""
+
+    def __init__(self, merge_every: int = 8):
+        self.merge_every = merge_every
+        self.keys, self.counts = empty_counts()
+        self.parts = []
+
+    def add(self, keys: np.ndarray, counts: np.ndarray):
+        if len(keys) == 0:
+            return
+        self.parts.append((keys, counts))
+        if len(self.parts) >= self.merge_every:
+            self._merge()
+
+    def _merge(self):
+        self.keys, self.counts = merge_counts([(self.keys, self.counts)] + self.parts)
+        self.parts = []
+
+    def __len__(self) -> int:
+        return len(self.keys) + sum(len(keys) for keys, _ in self.parts)
+
+    def scan_chunk(self, scan_chunk_size: int) -> int:
+        """id 스트림을 읽을 청크 크기 (토큰 수)"""
+        return scan_chunk_size
+
+    def window_chunk(self, window_size: int) -> int:
+        """add 한 번에 넘길 윈도우 수"""
+        return DEFAULT_WINDOW_CHUNK
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        self._merge()
+        return self.keys, self.counts
+
+    def iter_result(self, min_count: int = 1) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """빈도가 min_count 이상인 (keys, counts)를 키 순서의 블록으로 순회"""
+        keys, counts = self.result()
+        strong = counts >= min_count
+        yield keys[strong], counts[strong]
+
+
+class BoundedCountTable(CountTable):
+    """항목 수 상한이 있는 테이블 (상한을 넘으면 빈도가 낮은 후보부터 가지치기)
+
+    항목을 추가할 때마다 상한을 확인해, 넘치면 먼저 min_count 미만 항목을 버리고
+    그래도 넘치면 빈도 하한을 올려 상한의 절반까지 줄인다.
+    가지치기가 한 번도 일어나지 않으면 결과는 정확하다. 일어났다면 lossy counting처럼
+    항목마다 오차 상한(delta)을 함께 들고 다닌다: 새로 들어오는 키는 그때까지 버려진 항목의
+    (빈도 + delta) 최댓값을 delta로 받으므로, 여러 번 버려졌다 다시 들어온 키의 누적 손실도
+    실제 빈도 <= 저장된 빈도 + delta 로 묶인다.
+    """
+
+    def __init__(self, max_entries: int, min_count: int = 1, merge_every: int = 8):
+        super().__init__(merge_every)
+        self.max_entries = max_entries
+        self.min_count = min_count
+        self.deltas = np.zeros(0, dtype=COUNT_DTYPE)
+        self.pruned_entries = 0
+        # 가지치기 당시 이미 min_count 이상이었던(강한) 항목 수
+        self.pruned_strong_entries = 0
+        # 버려진 항목의 (빈도 + delta) 최댓값 = 지금 새로 들어오는 키의 delta
+        self.max_error = 0
+
+    def add(self, keys: np.ndarray, counts: np.ndarray):
+        super().add(keys, counts)
+        # merge_every개를 기다리지 않고 상한을 넘는 즉시 병합/가지치기
+        if len(self) > self.max_entries:
+            self._merge()
+
+    def _merge(self):
+        old_keys, old_deltas = self.keys, self.deltas
+        super()._merge()
+        # 테이블에 남아 있던 키는 delta 유지, 새 키는 현재 오차 상한
+        deltas = np.full(len(self.keys), self.max_error, dtype=COUNT_DTYPE)
+        if len(old_keys):
+            positions = np.searchsorted(self.keys, old_keys)
+            deltas[positions] = old_deltas
+        self.deltas = deltas
+        if len(self.keys) > self.max_entries:
+            self._prune()
+
+    def _prune(self):
+        cutoff = self.min_count
+        target = max(self.max_entries // 2, 1)
+        if np.count_nonzero(self.counts >= cutoff) > target:
+            # 상위 target번째 빈도보다 큰 항목만 남긴다
+            kth = len(self.counts) - target
+            cutoff = max(cutoff, int(np.partition(self.counts, kth)[kth]) + 1)
+        survive = self.counts >= cutoff
+        pruned = ~survive
+        if pruned.any():
+            pruned_counts = self.counts[pruned]
+            self.pruned_entries += len(pruned_counts)
+            self.pruned_strong_entries += int(np.count_nonzero(pruned_counts >= self.min_count))
+            self.max_error = max(self.max_error, int((pruned_counts + self.deltas[pruned]).max()))
+        self.keys = self.keys[survive]
+        self.counts = self.counts[survive]
+        self.deltas = self.deltas[survive]
+
+    def max_undercount(self, min_count: int = 1) -> int:
+        """빈도가 min_count 이상인 결과 항목의 최대 과소 계산량 (0이면 정확)"""
+        self._merge()
+        strong = self.counts >= min_count
+        return int(self.deltas[strong].max()) if strong.any() else 0
+
+
+class SpillingCountTable(CountTable):
+    """메모리 예산을 넘으면 정렬된 부분 결과(run)를 디스크로 내보내는 테이블
+
+    결과를 읽을 때 run들을 키 구간 단위로 k-way 병합하므로, 전체 간선 수와 관계없이
+    메모리 사용량은 예산 안에서 유지된다. 스캔/윈도우 청크 크기도 예산에서 정해
+    (scan_chunk, window_chunk) 청크 처리 중 임시 배열까지 예산에 들어가게 한다.
+    """
+
+    def __init__(self, memory_budget_bytes: int, spill_dir: Optional[str] = None, merge_every: int = 8):
+        super().__init__(merge_every)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = spill_dir
+        self.run_dir = None
+        self.runs: List[Tuple[str, str]] = []
+
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.counts.nbytes + sum(k.nbytes + c.nbytes for k, c in self.parts)
+
+    def scan_chunk(self, scan_chunk_size: int) -> int:
+        """스캔 청크 버퍼가 예산의 1/4을 넘지 않는 토큰 수"""
+        return int(min(scan_chunk_size, max(self.memory_budget_bytes // (4 * SCAN_TOKEN_BYTES), 4096)))
+
+    def window_chunk(self, window_size: int) -> int:
+        """윈도우 청크 하나의 임시 메모리가 예산의 1/4을 넘지 않는 윈도우 수"""
+        pairs_per_window = max(window_size * (window_size - 1) // 2, 1)
+        chunk = self.memory_budget_bytes // (4 * WINDOW_PAIR_BYTES * pairs_per_window)
+        return int(min(max(chunk, 1024), DEFAULT_WINDOW_CHUNK))
+
+    def add(self, keys: np.ndarray, counts: np.ndarray):
+        super().add(keys, counts)
+        # 병합(np.unique, bincount) 중 임시 배열이 저장된 크기의 약 5배이므로 예산의 1/8에서 내보낸다
+        if self.nbytes() > self.memory_budget_bytes // 8:
+            self._merge()
+            self._spill()
+
+    def _spill(self):
+        if len(self.keys) == 0:
+            return
+        if self.run_dir is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self.run_dir = tempfile.mkdtemp(prefix="edge_spill_", dir=self.spill_dir)
+        prefix = os.path.join(self.run_dir, f"run_{len(self.runs):05d}")
+        np.save(prefix + ".keys.npy", self.keys)
+        np.save(prefix + ".counts.npy", self.counts)
+        self.runs.append((prefix + ".keys.npy", prefix + ".counts.npy"))
+        logging.info(f"Spilled {len(self.keys)} edge counts to disk (run {len(self.runs)})")
+        self.keys, self.counts = empty_counts()
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.runs:
+            return super().result()
+        return merge_counts(list(self.iter_result()))
+
+    def iter_result(self, min_count: int = 1) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        if not self.runs:
+            yield from super().iter_result(min_count)
+            return
+
+        self._merge()
+        self._spill()
+        try:
+            runs = [(np.load(keys_path, mmap_mode='r'), np.load(counts_path, mmap_mode='r'))
+                    for keys_path, counts_path in self.runs]
+            block = merge_block_size(self.memory_budget_bytes, len(runs))
+            yield from merge_sorted_runs(runs, block, min_count)
+        finally:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            self.run_dir = None
+            self.runs = []
+
+
+def merge_block_size(memory_budget_bytes: int, n_runs: int) -> int:
+    """run마다 한 단계에 읽을 항목 수: 전체가 예산의 1/8 (병합 임시 배열 포함 예산 안)"""
+    return max(memory_budget_bytes // (8 * MERGE_ENTRY_BYTES * max(n_runs, 1)), 1024)
+
+
+def merge_sorted_runs(runs: List[Tuple[np.ndarray, np.ndarray]], block: int,
+                       min_count: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """정렬된 run들을 키 구간 단위로 k-way 병합
+
+    매 단계의 상한 키는 각 run의 다음 block개 중 마지막 키들의 최솟값이므로,
+    한 단계에서 run마다 최대 block개만 메모리로 읽는다.
+    """
+    cursors = [0] * len(runs)
+    while True:
+        active = [i for i, (keys, _) in enumerate(runs) if cursors[i] < len(keys)]
+        if not active:
+            return
+        bound = min(runs[i][0][min(cursors[i] + block, len(runs[i][0])) - 1] for i in active)
+
+        parts = []
+        for i in active:
+            keys, counts = runs[i]
+            start = cursors[i]
+            end = start + int(np.searchsorted(keys[start:start + block], bound, side='right'))
+            parts.append((np.asarray(keys[start:end]), np.asarray(counts[start:end])))
+            cursors[i] = end
+
+        merged_keys, merged_counts = merge_counts(parts)
+        strong = merged_counts >= min_count
+        yield merged_keys[strong], merged_counts[strong]
+
+
+def iter_window_buffers(chunks: Iterable[np.ndarray], keep: np.ndarray,
+                        window_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """keep 단어만 남긴 청크와, 직전 청크 꼬리를 이어 붙인 윈도우 계산용 버퍼를 순회
+
+    청크 경계를 걸치는 윈도우는 직전 청크의 마지막 window_size - 1개 토큰을 이어 붙여 센다.
+    """
+    carry = None
+    for chunk in chunks:
+        filtered = chunk[keep[chunk]]
+        buffer = np.concatenate([carry, filtered]) if carry is not None and len(carry) else filtered
+        yield filtered, buffer
+        carry = buffer[max(len(buffer) - window_size + 1, 0):]
+
+
+def fill_window_pair_table(chunks: Iterable[np.ndarray], keep: np.ndarray, window_size: int,
+                           n_vocab: int, table: CountTable) -> CountTable:
+    """청크로 나뉜 id 스트림에서 keep 단어만 남긴 시퀀스의 윈도우 공동출현 빈도를 table에 누적
+
+    윈도우 청크마다 바로 table에 넣으므로, 스캔 청크 전체의 부분 결과를 한꺼번에 들고 있지 않는다.
+    """
+    chunk_windows = table.window_chunk(window_size)
+    for _, buffer in iter_window_buffers(chunks, keep, window_size):
+        for keys, counts in iter_window_pair_counts(buffer, window_size, n_vocab, chunk_windows):
+            table.add(keys, counts)
+    return table
+
+
+def count_stream_window_pairs(chunks: Iterable[np.ndarray], keep: np.ndarray, window_size: int,
+                              n_vocab: int) -> Tuple[np.ndarray, np.ndarray]:
+    """청크로 나뉜 id 스트림에서 keep 단어만 남긴 시퀀스의 윈도우 공동출현 빈도 계산"""
+    return fill_window_pair_table(chunks, keep, window_size, n_vocab, CountTable()).result()
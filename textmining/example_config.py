@@ -63,6 +63,7 @@ large_doc_config = AnalysisConfig(
     # 대용량 문서에 최적화
     char_limit=100000000,  # 더 많은 텍스트 처리
     min_word_freq=5,       # 높은 빈도 임계값
+    use_token_store=True,  # 디스크 토큰 저장소 사용 (재분석 시 재사용)
     batch_size=5000,       # 메모리 효율성을 위한 작은 배치
     window_size=3,         # 빠른 처리를 위한 작은 윈도우
     min_edge_weight=3,     # 높은 간선 가중치 임계값
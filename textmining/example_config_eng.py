@@ -63,6 +63,7 @@ large_doc_config = AnalysisConfig(
     # Optimized for large documents
     char_limit=100000000,  # Process more text
     min_word_freq=5,       # Higher frequency threshold
+    use_token_store=True,  # Memory-mapped token store (reused on re-analysis)
     batch_size=5000,       # Smaller batches for memory efficiency
     window_size=3,         # Smaller window for faster processing
     min_edge_weight=3,     # Higher edge weight threshold
@@ -1,14 +1,17 @@
 
 import os
-import fitz
 from konlpy.tag import Okt
 from collections import Counter
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import re
 import logging
-from typing import Set, List, Tuple
+from typing import Dict, Iterator, Optional, Set, List, Tuple
 from TMconfig import AnalysisConfig
+from token_stream import TokenStream, TokenStreamBuilder
+from token_store import TokenStoreWriter, file_fingerprint, open_token_store, token_store_matches
+from pdf_extraction import ExtractionStats, iter_extracted_ranges
+from noun_filter import NounFilter, cached_noun_filter
 import matplotlib
 matplotlib.use('Agg')  # GUI 없이 이미지 생성용
 
@@ -24,38 +27,100 @@ plt.rcParams['axes.unicode_minus'] = False  # 마이너스 부호 깨짐 방지
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 class EnhancedKeywordAnalyzer:
-    def __init__(self, config: AnalysisConfig):
+    def __init__(self, config: AnalysisConfig, okt: Optional[Okt] = None,
+                 stopwords: Optional[Set[str]] = None):
+        """okt/stopwords를 넘기면 이미 띄워둔 Okt와 로드된 불용어를 재사용"""
         self.config = config
-        self.okt = Okt()
+        self._okt = okt
+        self._stopwords = stopwords
+        self._noun_filter = None
     
-    def extract_text_from_pdfs_streaming(self, folder_path: str) -> str:
-        """텍스트 추출"""
-        text_chunks = []
+    @property
+    def okt(self) -> Okt:
+        """Okt(JVM)는 실제로 명사 추출이 필요할 때 처음 생성"""
+        if self._okt is None:
+            self._okt = Okt()
+        return self._okt
+    
+    def list_pdf_files(self, folder_path: str) -> List[str]:
+        """분석할 PDF 파일 목록 (config.pdf_files가 있으면 그 목록, 없으면 폴더 내 이름순)
+        
+        include_subfolders이면 하위 폴더까지 포함한다 (하위 폴더 이름은 문서 라벨로 쓰임).
+        """
+        if self.config.pdf_files:
+            return list(self.config.pdf_files)
+        if not self.config.include_subfolders:
+            return [os.path.join(folder_path, filename) for filename in sorted(os.listdir(folder_path))
+                    if filename.lower().endswith(".pdf")]
+        
+        pdf_paths = []
+        for root, dirs, files in os.walk(folder_path):
+            dirs.sort()
+            pdf_paths.extend(os.path.join(root, filename) for filename in sorted(files)
+                             if filename.lower().endswith(".pdf"))
+        return pdf_paths
+    
+    def document_name(self, pdf_path: str) -> str:
+        """문서 이름: pdf_folder 기준 상대 경로 (예: "HRD/jd1.pdf"), 폴더 밖 파일은 파일명"""
+        relative = os.path.relpath(os.path.abspath(pdf_path), os.path.abspath(self.config.pdf_folder))
+        if relative.startswith(os.pardir):
+            return os.path.basename(pdf_path)
+        return relative.replace(os.sep, '/')
+    
+    def iter_pdf_texts(self, folder_path: str) -> Iterator[Tuple[str, str]]:
+        """문서 단위로 (문서 이름, 텍스트) 추출
+        
+        큰 문서는 pages_per_shard 페이지 구간으로 나누어 extract_workers개 프로세스에서 추출한다.
+        """
         total_chars = 0
+        stats = ExtractionStats()
+        current_path, text_chunks = None, []
         
-        for filename in os.listdir(folder_path):
-            if filename.lower().endswith(".pdf"):
-                pdf_path = os.path.join(folder_path, filename)
-                logging.info(f"Processing file: {filename}")
-                
-                try:
-                    with fitz.open(pdf_path) as doc:
-                        for page_num, page in enumerate(doc):
-                            page_text = page.get_text()
-                            if total_chars + len(page_text) > self.config.char_limit:
-                                remaining = self.config.char_limit - total_chars
-                                text_chunks.append(page_text[:remaining])
-                                logging.info(f"Character limit {self.config.char_limit} reached.")
-                                return ''.join(text_chunks)
-                            
-                            text_chunks.append(page_text)
-                            total_chars += len(page_text)
-                            
-                except Exception as e:
-                    logging.error(f"Error processing {filename}: {e}")
+        ranges = iter_extracted_ranges(self.list_pdf_files(folder_path), self.config.extract_workers,
+                                       self.config.pages_per_shard)
+        try:
+            for result in ranges:
+                filename = self.document_name(result.pdf_path)
+                if not result.opened:
+                    # 열지 못한 파일은 문서로 만들지 않고 통계에만 남긴다
+                    stats.files += 1
+                    stats.add(result)
+                    logging.error(result.error)
                     continue
+                if result.pdf_path != current_path:
+                    if current_path is not None:
+                        yield self.document_name(current_path), ''.join(text_chunks)
+                    current_path, text_chunks = result.pdf_path, []
+                    stats.files += 1
+                    logging.info(f"Processing file: {filename}")
+                
+                stats.add(result)
+                # 오류가 난 구간도 그 전까지 읽은 페이지는 사용
+                if result.error:
+                    logging.error(f"Error processing {filename} (pages {result.start}-{result.stop}): {result.error}")
+                
+                page_text = result.text
+                if total_chars + len(page_text) > self.config.char_limit:
+                    remaining = self.config.char_limit - total_chars
+                    text_chunks.append(page_text[:remaining])
+                    logging.info(f"Character limit {self.config.char_limit} reached.")
+                    break
+                
+                text_chunks.append(page_text)
+                total_chars += len(page_text)
+        finally:
+            ranges.close()
         
-        return ''.join(text_chunks)
+        if current_path is not None:
+            yield self.document_name(current_path), ''.join(text_chunks)
+        
+        logging.info(f"Extracted {stats.pages} pages from {stats.files} files in {stats.ranges} page ranges "
+                     f"({stats.skipped_pages} pages without text layer skipped, {stats.errors} errors, "
+                     f"{stats.failed_files} files could not be opened)")
+    
+    def extract_text_from_pdfs_streaming(self, folder_path: str) -> str:
+        """텍스트 추출"""
+        return ''.join(text for _, text in self.iter_pdf_texts(folder_path))
     
     def enhanced_clean_text(self, text: str) -> str:
         """텍스트 전처리"""
@@ -76,44 +141,30 @@ class EnhancedKeywordAnalyzer:
         
         return text.strip()
     
-    def preprocess_and_extract_nouns_batch(self, text: str, stopwords: Set[str] = set()) -> List[str]:
-        """배치 단위로 명사 추출하여 메모리 효율성 개선"""
-        all_nouns = []
+    def preprocess_and_extract_nouns_batch(self, text: str, stopwords: Set[str] = set()) -> TokenStream:
+        """배치 단위로 명사 추출하여 메모리 효율성 개선 (id 시퀀스로 누적)"""
+        builder = TokenStreamBuilder()
+        self.extract_nouns_into(builder, text, stopwords)
         
-        # 텍스트를 배치 단위로 나누어 처리
+        logging.info(f"Extracted {len(builder)} nouns after filtering.")
+        return builder.build()
+    
+    def extract_nouns_into(self, builder: TokenStreamBuilder, text: str, stopwords: Set[str]):
+        """텍스트를 배치 단위로 나누어 명사를 추출하고 builder에 추가"""
         for i in range(0, len(text), self.config.batch_size):
             batch_text = text[i:i + self.config.batch_size]
             nouns = self.okt.nouns(batch_text)
-            filtered = self.filter_nouns_advanced(nouns, stopwords)
-            all_nouns.extend(filtered)
-        
-        logging.info(f"Extracted {len(all_nouns)} nouns after filtering.")
-        return all_nouns
+            builder.extend(self.filter_nouns_advanced(nouns, stopwords))
+    
+    def get_noun_filter(self, stopwords: Set[str]) -> NounFilter:
+        """불용어 집합에 맞춰 컴파일된 명사 필터 (같은 설정/불용어면 분석기 사이에서도 재사용)"""
+        if self._noun_filter is None or self._noun_filter.stopwords is not stopwords:
+            self._noun_filter = cached_noun_filter(self.config, stopwords)
+        return self._noun_filter
     
     def filter_nouns_advanced(self, nouns: List[str], stopwords: Set[str]) -> List[str]:
         """명사 필터링"""
-        filtered = []
-        
-        for word in nouns:
-            # 길이 조건
-            if len(word) < self.config.min_word_length or len(word) > self.config.max_word_length:
-                continue
-                
-            # 불용어 체크
-            if word in stopwords:
-                continue
-                
-            # 단일 문자 반복 제거 (예: "aaaa", "1111")
-            if len(set(word)) == 1:
-                continue
-                
-            # 의미없는 패턴 제거
-            if re.match(r'^[가-힣]{1}[0-9]+$', word):  # "가1", "나123" 등
-                continue
-                
-            filtered.append(word)
-        
-        return filtered
+        return self.get_noun_filter(stopwords).filter(nouns)
     
     def load_stopwords(self, stopwords_path: str) -> Set[str]:
         """불용어 로드"""
@@ -126,8 +177,8 @@ class EnhancedKeywordAnalyzer:
             logging.info("No stopwords file provided or file not found.")
         return stopwords
     
-    def create_enhanced_wordcloud(self, freq_dict: dict, output_path: str = None):
-        """워드클라우드 생성"""
+    def create_enhanced_wordcloud(self, freq_dict: dict, output_path: str = None, show: bool = False):
+        """워드클라우드 생성 (show=True일 때만 미리보기 그림 생성)"""
         wc = WordCloud(
             font_path=self.config.font_path,
             width=800,
@@ -142,44 +193,82 @@ class EnhancedKeywordAnalyzer:
         
         wc.generate_from_frequencies(freq_dict)
         
-        plt.figure(figsize=(12, 8))
-        plt.imshow(wc, interpolation='bilinear')
-        plt.axis('off')
-        plt.title('키워드 워드클라우드', fontsize=16, pad=20)
-        plt.tight_layout()
-        
         if output_path:
             wc.to_file(output_path)
             logging.info(f"Wordcloud saved to {output_path}")
         
-        plt.show()
+        if show:
+            plt.figure(figsize=(12, 8))
+            plt.imshow(wc, interpolation='bilinear')
+            plt.axis('off')
+            plt.title('키워드 워드클라우드', fontsize=16, pad=20)
+            plt.tight_layout()
+            plt.show()
     
-    def analyze(self) -> Tuple[List[str], Counter]:
-        """전체 분석 실행"""
-        # 1. PDF 텍스트 추출
-        raw_text = self.extract_text_from_pdfs_streaming(self.config.pdf_folder)
+    def token_store_dir(self) -> str:
+        return self.config.token_store_dir or os.path.join(self.config.output_dir, "token_store")
+    
+    def token_store_source(self) -> Dict:
+        """토큰 저장소를 재사용해도 되는지 판단하는 생성 조건
+        
+        PDF는 (경로, 크기, 수정 시각), 불용어/동의어 파일은 내용 해시까지 비교하므로
+        파일을 추가/삭제/수정하면 저장소를 다시 만든다.
+        """
+        return {
+            'pdf_folder': os.path.abspath(self.config.pdf_folder),
+            'pdf_files': [file_fingerprint(path) for path in self.list_pdf_files(self.config.pdf_folder)],
+            'include_subfolders': self.config.include_subfolders,
+            'stopwords_file': file_fingerprint(self.config.stopwords_file, content_hash=True),
+            'char_limit': self.config.char_limit,
+            'min_word_length': self.config.min_word_length,
+            'max_word_length': self.config.max_word_length,
+            'deny_patterns': list(self.config.deny_patterns),
+            'synonyms_file': file_fingerprint(self.config.synonyms_file, content_hash=True),
+            'batch_size': self.config.batch_size,
+        }
+    
+    def tokenize(self) -> TokenStream:
+        """PDF 추출 -> 전처리 -> 명사 추출을 문서 단위로 수행해 토큰 스트림 생성"""
+        store_dir = self.token_store_dir()
+        source = self.token_store_source()
+        
+        # 같은 조건의 토큰 저장소가 있으면 PDF 추출과 Okt를 건너뛴다
+        if self.config.use_token_store and self.config.reuse_token_store and token_store_matches(store_dir, source):
+            logging.info(f"Reusing token store: {store_dir}")
+            return open_token_store(store_dir)
         
-        # 2. 텍스트 전처리
-        cleaned_text = self.enhanced_clean_text(raw_text)
+        # 불용어 로드
+        if self._stopwords is not None:
+            stopwords = self._stopwords
+        else:
+            stopwords = self.load_stopwords(self.config.stopwords_file)
         
-        # 3. 불용어 로드
-        stopwords = self.load_stopwords(self.config.stopwords_file)
+        if self.config.use_token_store:
+            builder = TokenStoreWriter(store_dir, source)
+        else:
+            builder = TokenStreamBuilder()
         
-        # 4. 명사 추출
-        nouns = self.preprocess_and_extract_nouns_batch(cleaned_text, stopwords)
+        for filename, raw_text in self.iter_pdf_texts(self.config.pdf_folder):
+            cleaned_text = self.enhanced_clean_text(raw_text)
+            self.extract_nouns_into(builder, cleaned_text, stopwords)
+            builder.end_document(filename)
         
-        # 5. 빈도 계산
-        freq = Counter(nouns)
+        logging.info(f"Extracted {len(builder)} nouns after filtering.")
+        return builder.build()
+    
+    def analyze(self) -> Tuple[TokenStream, Counter]:
+        """전체 분석 실행"""
+        # 1~4. PDF 텍스트 추출, 전처리, 불용어 로드, 명사 추출 (또는 토큰 저장소 재사용)
+        nouns = self.tokenize()
         
-        # 빈도가 낮은 단어 제거
-        filtered_freq = Counter({word: count for word, count in freq.items() 
-                               if count >= self.config.min_word_freq})
+        # 5. 빈도 계산 (빈도가 낮은 단어 제거)
+        filtered_freq = nouns.to_counter(self.config.min_word_freq, nouns.counts(self.config.scan_chunk_size))
         
         logging.info(f"Top 10 keywords: {list(filtered_freq.most_common(10))}")
         
         return nouns, filtered_freq
 
-def get_enhanced_nouns_and_freq(config: AnalysisConfig) -> Tuple[List[str], Counter]:
+def get_enhanced_nouns_and_freq(config: AnalysisConfig) -> Tuple[TokenStream, Counter]:
     """호출 API"""
     analyzer = EnhancedKeywordAnalyzer(config)
     return analyzer.analyze()
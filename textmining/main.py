@@ -1,12 +1,110 @@
 
 import os
+import time
 import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Sequence, Tuple
 from TMconfig import AnalysisConfig
 from keyword_pdf_kor import EnhancedKeywordAnalyzer
 from build_cooccurrence_network import EnhancedCooccurrenceNetwork
+from network_backbone import NetworkBackbone
+from document_term import DocumentTermMatrix
+
+class StageProfiler:
+    """단계별 실행 구간을 기록하고 단계가 겹친 시간을 보고"""
+    
+    def __init__(self):
+        self.spans: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+    
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.spans[name] = (start, time.perf_counter())
+    
+    def seconds(self, name: str) -> float:
+        start, end = self.spans[name]
+        return end - start
+    
+    def report(self) -> Dict:
+        """단계 시간 합과 실제 경과 시간 비교
+        
+        겹쳐 실행된 단계의 시간에는 GIL 경합으로 늘어난 시간이 들어 있으므로, 합과 경과 시간의 차이
+        (overlap_seconds)는 절약한 시간의 상한일 뿐이다. 실제 효과는 max_parallel_stages=1 실행과 비교한다.
+        """
+        stage_seconds = {name: end - start for name, (start, end) in self.spans.items()}
+        summed = sum(stage_seconds.values())
+        wall = max((end for _, end in self.spans.values()), default=self._origin) - self._origin
+        return {
+            'stages': stage_seconds,
+            'summed_stage_seconds': summed,
+            'wall_seconds': wall,
+            'overlap_seconds': max(summed - wall, 0.0),
+        }
+    
+    def log_report(self):
+        report = self.report()
+        for name, seconds in report['stages'].items():
+            logging.info(f"  [stage] {name}: {seconds:.2f}s")
+        logging.info(f"Stage times sum to {report['summed_stage_seconds']:.2f}s, "
+                     f"{report['wall_seconds']:.2f}s wall clock "
+                     f"(stages overlapped {report['overlap_seconds']:.2f}s; upper bound on time saved, "
+                     f"compare with max_parallel_stages=1 for the real gain)")
+
+class StageScheduler:
+    """의존 관계가 풀린 단계를 바로 실행하는 스레드 기반 단계 스케줄러
+    
+    각 단계 함수는 deps 순서대로 선행 단계의 결과를 인자로 받는다.
+    """
+    
+    def __init__(self, max_workers: int = 3, profiler: StageProfiler = None):
+        self.max_workers = max(max_workers, 1)
+        self.profiler = profiler or StageProfiler()
+        self.stages: Dict[str, Tuple[Callable, Sequence[str]]] = {}
+    
+    def add_stage(self, name: str, func: Callable, deps: Sequence[str] = ()):
+        self.stages[name] = (func, tuple(deps))
+    
+    def _run_stage(self, name: str, func: Callable, args: list):
+        with self.profiler.stage(name):
+            return func(*args)
+    
+    def run(self) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, (func, deps) in list(pending.items()):
+                    if all(dep in results for dep in deps):
+                        args = [results[dep] for dep in deps]
+                        running[pool.submit(self._run_stage, name, func, args)] = name
+                        del pending[name]
+                
+                if not running:
+                    raise RuntimeError(f"Unresolvable stage dependencies: {sorted(pending)}")
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+        
+        return results
 
 def run_complete_analysis(config: AnalysisConfig):
-    """전체 분석 파이프라인 실행"""
+    """전체 분석 파이프라인 실행
+    
+    워드클라우드는 빈도가 나오는 즉시, 메트릭은 워드클라우드와 동시에,
+    GEXF/JSON 저장은 시각화와 동시에 실행된다 (config.max_parallel_stages = 1이면 순차 실행).
+    """
     
     # 출력 디렉토리 생성
     os.makedirs(config.output_dir, exist_ok=True)
@@ -14,33 +112,105 @@ def run_complete_analysis(config: AnalysisConfig):
     logging.info("=== 키워드 분석 및 공동출현 네트워크 분석 시작 ===")
     
     try:
-        # 1. 키워드 분석
-        logging.info("1. 키워드 추출 중...")
         analyzer = EnhancedKeywordAnalyzer(config)
-        nouns, freq = analyzer.analyze()
+        network_analyzer = EnhancedCooccurrenceNetwork(config)
+        profiler = StageProfiler()
+        # 백본 비교 시간은 다른 단계(저장, 워드클라우드 등)와 GIL을 다투지 않도록 순차 실행에서 잰다
+        max_parallel_stages = config.max_parallel_stages
+        if config.backbone_method and config.backbone_compare_metrics and max_parallel_stages != 1:
+            logging.info("backbone_compare_metrics: running stages sequentially so metric timings "
+                         "are not skewed by concurrent stages")
+            max_parallel_stages = 1
+        scheduler = StageScheduler(max_parallel_stages, profiler)
+        
+        # 1. 키워드 분석
+        def analyze_stage():
+            logging.info("1. 키워드 추출 중...")
+            return analyzer.analyze()
         
         # 워드클라우드 생성
-        if freq:
-            wordcloud_path = os.path.join(config.output_dir, "wordcloud.png")
-            analyzer.create_enhanced_wordcloud(dict(freq.most_common(100)), wordcloud_path)
+        def wordcloud_stage(analysis):
+            _, freq = analysis
+            if freq:
+                wordcloud_path = os.path.join(config.output_dir, "wordcloud.png")
+                analyzer.create_enhanced_wordcloud(dict(freq.most_common(100)), wordcloud_path)
         
-        # 2. 네트워크 분석
-        logging.info("2. 공동출현 네트워크 생성 중...")
-        network_analyzer = EnhancedCooccurrenceNetwork(config)
-        G = network_analyzer.build_cooccurrence_network(nouns)
+        # 2. 네트워크 분석 (+ 선택적 백본 추출)
+        def network_stage(analysis):
+            logging.info("2. 공동출현 네트워크 생성 중...")
+            nouns, _ = analysis
+            G = network_analyzer.build_cooccurrence_network(nouns)
+            backbone_stats = None
+            full_graph = None
+            if config.backbone_method:
+                logging.info("2-1. 네트워크 백본 추출 중...")
+                if config.backbone_compare_metrics:
+                    full_graph = G
+                G, backbone_stats = NetworkBackbone(config).extract(G)
+                logging.info("Saved network files, index and visualization will contain the backbone only")
+            return G, backbone_stats, full_graph
         
         # 3. 네트워크 메트릭 계산
-        logging.info("3. 네트워크 분석 중...")
-        metrics = network_analyzer.calculate_network_metrics(G)
+        def metrics_stage(network):
+            logging.info("3. 네트워크 분석 중...")
+            G, backbone_stats, full_graph = network
+            metrics_start = time.perf_counter()
+            metrics = network_analyzer.calculate_network_metrics(G)
+            metrics_seconds = time.perf_counter() - metrics_start
+            logging.info(f"Network metrics calculated in {metrics_seconds:.2f}s")
+            if backbone_stats:
+                backbone_stats['metrics_seconds'] = metrics_seconds
+                # 병렬 실행 중에 잰 시간은 GIL 경합이 섞여 있다
+                backbone_stats['metrics_timed_sequentially'] = max_parallel_stages == 1
+                if full_graph is not None:
+                    # 같은 메트릭을 원본 그래프에서도 계산해 실제 속도 향상을 잰다
+                    full_start = time.perf_counter()
+                    network_analyzer.calculate_network_metrics(full_graph)
+                    full_seconds = time.perf_counter() - full_start
+                    backbone_stats['full_metrics_seconds'] = full_seconds
+                    backbone_stats['measured_metric_speedup'] = full_seconds / max(metrics_seconds, 1e-9)
+                    logging.info(f"Full-graph metrics took {full_seconds:.2f}s "
+                                 f"(backbone x{backbone_stats['measured_metric_speedup']:.1f} faster, measured)")
+                metrics['backbone'] = backbone_stats
+            return metrics
+        
+        # 2-2. 문서 x 단어 행렬과 TF-IDF 키워드 (네트워크와 동시에 진행)
+        def document_term_stage(analysis):
+            logging.info("2-2. 문서-단어 행렬 생성 중...")
+            nouns, _ = analysis
+            dtm = DocumentTermMatrix.from_tokens(nouns, config.scan_chunk_size)
+            dtm.save(config.output_dir, config.tfidf_top_k)
+            return dtm
+        
+        # 4. 결과 저장 (그래프 파일은 메트릭을 기다리지 않는다)
+        def save_graph_stage(network):
+            logging.info("4. 결과 저장 중...")
+            network_analyzer.save_graph_files(network[0], config.output_dir)
         
-        # 4. 결과 저장
-        logging.info("4. 결과 저장 중...")
-        network_analyzer.save_network_results(G, metrics, config.output_dir)
+        def save_metrics_stage(metrics):
+            network_analyzer.save_metrics(metrics, config.output_dir)
         
         # 5. 시각화
-        logging.info("5. 네트워크 시각화 중...")
-        viz_path = os.path.join(config.output_dir, "network_visualization.png")
-        network_analyzer.draw_enhanced_network(G, metrics, output_path=viz_path)
+        def draw_stage(network, metrics):
+            logging.info("5. 네트워크 시각화 중...")
+            viz_path = os.path.join(config.output_dir, "network_visualization.png")
+            network_analyzer.draw_enhanced_network(network[0], metrics, output_path=viz_path)
+        
+        scheduler.add_stage("analyze", analyze_stage)
+        scheduler.add_stage("wordcloud", wordcloud_stage, ["analyze"])
+        scheduler.add_stage("network", network_stage, ["analyze"])
+        if config.build_document_term_matrix:
+            scheduler.add_stage("document_terms", document_term_stage, ["analyze"])
+        scheduler.add_stage("metrics", metrics_stage, ["network"])
+        scheduler.add_stage("save_graph", save_graph_stage, ["network"])
+        scheduler.add_stage("save_metrics", save_metrics_stage, ["metrics"])
+        scheduler.add_stage("draw", draw_stage, ["network", "metrics"])
+        
+        results = scheduler.run()
+        nouns, freq = results["analyze"]
+        G = results["network"][0]
+        metrics = results["metrics"]
+        profiler.log_report()
         
         # 6. 결과 요약 출력
         print("\n=== 분석 결과 요약 ===")
@@ -51,10 +221,15 @@ def run_complete_analysis(config: AnalysisConfig):
         print(f"네트워크 밀도: {metrics.get('density', 0):.4f}")
         
         if freq:
-            print(f"\n상위 10개 키워드:")
+            print("\n상위 10개 키워드:")
             for i, (word, count) in enumerate(freq.most_common(10), 1):
                 print(f"  {i}. {word}: {count}회")
         
+        if "document_terms" in results:
+            print("\nTF-IDF 상위 10개 키워드:")
+            for i, (word, score) in enumerate(results["document_terms"].top_keywords(10), 1):
+                print(f"  {i}. {word}: {score:.4f}")
+        
         print(f"\n결과 파일들이 '{config.output_dir}' 폴더에 저장되었습니다.")
         
         logging.info("=== 분석 완료 ===")
@@ -84,7 +259,11 @@ if __name__ == "__main__":
         G, metrics, freq = run_complete_analysis(config)
         
         # 추가 분석이 필요하면 여기서 진행
-        # 예: 특정 키워드 중심의 서브네트워크 분석 등
+        # 예: 특정 키워드 중심의 서브네트워크 분석 (저장된 인접 인덱스 사용)
+        # from network_index import NetworkIndex
+        # index = NetworkIndex(os.path.join(config.output_dir, "index"))
+        # print(index.neighbors("데이터", k=10))
+        # sub_G = index.ego_graph("데이터", radius=1, k=20)
         
     except Exception as e:
         print(f"분석 실행 중 오류: {e}")
@@ -0,0 +1,148 @@
+import time
+import logging
+from typing import Dict, List, Tuple
+
+import networkx as nx
+import numpy as np
+
+from TMconfig import AnalysisConfig
+
+BACKBONE_METHODS = ("disparity", "topk", "npmi")
+
+
+def graph_to_arrays(G: nx.Graph) -> Tuple[List, np.ndarray, np.ndarray, np.ndarray]:
+    """그래프를 (노드 목록, 출발 인덱스, 도착 인덱스, 가중치) 간선 배열로 변환"""
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    n_edges = G.number_of_edges()
+    src = np.empty(n_edges, dtype=np.int64)
+    dst = np.empty(n_edges, dtype=np.int64)
+    weights = np.empty(n_edges, dtype=np.float64)
+    for i, (u, v, weight) in enumerate(G.edges(data='weight', default=1)):
+        src[i] = index[u]
+        dst[i] = index[v]
+        weights[i] = weight
+    return nodes, src, dst, weights
+
+
+def node_strength_degree(src: np.ndarray, dst: np.ndarray, weights: np.ndarray,
+                         n_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """노드별 가중치 합(strength)과 연결 수(degree)"""
+    strength = (np.bincount(src, weights=weights, minlength=n_nodes)
+                + np.bincount(dst, weights=weights, minlength=n_nodes))
+    degree = np.bincount(src, minlength=n_nodes) + np.bincount(dst, minlength=n_nodes)
+    return strength, degree
+
+
+def disparity_filter_mask(src: np.ndarray, dst: np.ndarray, weights: np.ndarray,
+                          n_nodes: int, alpha: float) -> np.ndarray:
+    """Disparity filter: 어느 한쪽 끝점 기준으로라도 유의한(p < alpha) 간선만 남긴다"""
+    strength, degree = node_strength_degree(src, dst, weights, n_nodes)
+
+    def p_value(node: np.ndarray) -> np.ndarray:
+        share = weights / strength[node]
+        return np.power(1.0 - share, degree[node] - 1)
+
+    return np.minimum(p_value(src), p_value(dst)) < alpha
+
+
+def top_k_mask(src: np.ndarray, dst: np.ndarray, weights: np.ndarray,
+               n_nodes: int, k: int) -> np.ndarray:
+    """노드마다 가중치 상위 k개 간선 (어느 한쪽 끝점에서라도 상위 k면 유지)"""
+    n_edges = len(weights)
+    endpoint = np.concatenate([src, dst])
+    edge_index = np.concatenate([np.arange(n_edges), np.arange(n_edges)])
+    endpoint_weight = np.concatenate([weights, weights])
+
+    # 끝점별로 묶고 그 안에서 가중치 내림차순 정렬한 뒤 순위를 매긴다
+    order = np.lexsort((-endpoint_weight, endpoint))
+    sorted_endpoint = endpoint[order]
+    group_start = np.searchsorted(sorted_endpoint, sorted_endpoint, side='left')
+    rank = np.arange(len(order)) - group_start
+
+    mask = np.zeros(n_edges, dtype=bool)
+    mask[edge_index[order[rank < k]]] = True
+    return mask
+
+
+def npmi_scores(src: np.ndarray, dst: np.ndarray, weights: np.ndarray, n_nodes: int) -> np.ndarray:
+    """간선 가중치 기반 정규화 PMI (-1 ~ 1)
+
+    p(i, j) = w_ij / W, p(i) = s_i / 2W (s_i: 노드 strength, W: 전체 간선 가중치)
+    """
+    strength, _ = node_strength_degree(src, dst, weights, n_nodes)
+    total = weights.sum()
+    p_joint = weights / total
+    p_src = strength[src] / (2 * total)
+    p_dst = strength[dst] / (2 * total)
+    pmi = np.log(p_joint) - np.log(p_src) - np.log(p_dst)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        npmi = pmi / -np.log(p_joint)
+    # 간선이 하나뿐이면 p(i, j) = 1 이므로 완전 공동출현으로 본다
+    return np.where(p_joint >= 1.0, 1.0, npmi)
+
+
+class NetworkBackbone:
+    """메트릭 계산/시각화 전에 정보량이 적은 간선을 걷어내는 백본 추출"""
+
+    def __init__(self, config: AnalysisConfig):
+        self.config = config
+
+    def edge_mask(self, method: str, src: np.ndarray, dst: np.ndarray,
+                  weights: np.ndarray, n_nodes: int) -> np.ndarray:
+        if method == "disparity":
+            return disparity_filter_mask(src, dst, weights, n_nodes, self.config.backbone_alpha)
+        if method == "topk":
+            return top_k_mask(src, dst, weights, n_nodes, self.config.backbone_top_k)
+        if method == "npmi":
+            return npmi_scores(src, dst, weights, n_nodes) >= self.config.backbone_min_npmi
+        raise ValueError(f"Unknown backbone method: {method} (choose from {BACKBONE_METHODS})")
+
+    def extract(self, G: nx.Graph) -> Tuple[nx.Graph, Dict]:
+        """config.backbone_method의 필터를 적용한 백본 그래프와 축소 통계 반환
+
+        "disparity+topk"처럼 '+'로 여러 방법을 묶으면 모든 조건을 통과한 간선만 남긴다.
+        """
+        start = time.perf_counter()
+        methods = [m.strip() for m in self.config.backbone_method.split('+') if m.strip()]
+        nodes, src, dst, weights = graph_to_arrays(G)
+
+        mask = np.ones(len(weights), dtype=bool)
+        if len(weights):
+            for method in methods:
+                mask &= self.edge_mask(method, src, dst, weights, len(nodes))
+
+        backbone = nx.Graph()
+        kept_nodes = np.unique(np.concatenate([src[mask], dst[mask]]))
+        backbone.add_nodes_from((nodes[i], G.nodes[nodes[i]]) for i in kept_nodes.tolist())
+        backbone.add_edges_from((nodes[u], nodes[v], G.edges[nodes[u], nodes[v]])
+                                for u, v in zip(src[mask].tolist(), dst[mask].tolist()))
+
+        stats = self.reduction_stats(G, backbone, methods, time.perf_counter() - start)
+        logging.info(f"Backbone ({'+'.join(methods)}): "
+                     f"nodes {stats['nodes_before']} -> {stats['nodes_after']}, "
+                     f"edges {stats['edges_before']} -> {stats['edges_after']} "
+                     f"({stats['edge_reduction']:.1%} removed), "
+                     f"n*m cost ratio x{stats['nm_cost_ratio']:.1f} (estimate, not measured), "
+                     f"took {stats['seconds']:.2f}s")
+        return backbone, stats
+
+    @staticmethod
+    def reduction_stats(G: nx.Graph, backbone: nx.Graph, methods: List[str], seconds: float) -> Dict:
+        nodes_before, edges_before = G.number_of_nodes(), G.number_of_edges()
+        nodes_after, edges_after = backbone.number_of_nodes(), backbone.number_of_edges()
+        # 매개/근접 중심성은 O(nm)이므로 n*m 비율을 비용 감소의 추정치로 기록한다
+        # (실측은 config.backbone_compare_metrics로 원본 그래프의 메트릭 시간을 함께 잰다)
+        cost_before = nodes_before * max(edges_before, 1)
+        cost_after = max(nodes_after, 1) * max(edges_after, 1)
+        return {
+            'methods': methods,
+            'nodes_before': nodes_before,
+            'nodes_after': nodes_after,
+            'edges_before': edges_before,
+            'edges_after': edges_after,
+            'node_reduction': 1 - nodes_after / nodes_before if nodes_before else 0.0,
+            'edge_reduction': 1 - edges_after / edges_before if edges_before else 0.0,
+            'nm_cost_ratio': cost_before / cost_after,
+            'seconds': seconds,
+        }
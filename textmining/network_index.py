@@ -0,0 +1,178 @@
+"""
+저장된 공동출현 네트워크의 인접 인덱스 (키워드 중심 서브네트워크 조회용)
+
+    python network_index.py build ./results
+    python network_index.py neighbors ./results/index 데이터 -k 10
+    python network_index.py ego ./results/index 데이터 --radius 1 -k 20
+    python network_index.py khop ./results/index 데이터 --hops 2
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from collections import deque
+from typing import Dict, List, Optional
+
+import networkx as nx
+import numpy as np
+
+from network_backbone import graph_to_arrays
+from network_writers import find_json_records, iter_json_records
+
+# 인덱스 디렉터리 구성 (이웃은 행마다 가중치 내림차순으로 정렬된 CSR)
+VOCAB_FILE = "vocab.txt"
+FREQ_FILE = "freq.npy"
+INDPTR_FILE = "indptr.npy"
+INDICES_FILE = "indices.npy"
+WEIGHTS_FILE = "weights.npy"
+
+
+def build_network_index(G: nx.Graph, index_dir: str):
+    """그래프를 CSR 인접 인덱스로 저장"""
+    os.makedirs(index_dir, exist_ok=True)
+    nodes, src, dst, weights = graph_to_arrays(G)
+    n_nodes = len(nodes)
+
+    rows = np.concatenate([src, dst])
+    cols = np.concatenate([dst, src])
+    row_weights = np.concatenate([weights, weights])
+    order = np.lexsort((-row_weights, rows))
+
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+    freqs = np.array([G.nodes[node].get('freq', 0) for node in nodes], dtype=np.int64)
+
+    np.save(os.path.join(index_dir, INDPTR_FILE), indptr)
+    np.save(os.path.join(index_dir, INDICES_FILE), cols[order].astype(np.int32))
+    np.save(os.path.join(index_dir, WEIGHTS_FILE), row_weights[order])
+    np.save(os.path.join(index_dir, FREQ_FILE), freqs)
+    with open(os.path.join(index_dir, VOCAB_FILE), 'w', encoding='utf-8') as f:
+        for node in nodes:
+            f.write(f"{node}\n")
+
+    logging.info(f"Network index saved to {index_dir}: {n_nodes} nodes, {len(src)} edges")
+
+
+def load_saved_network(output_dir: str) -> nx.Graph:
+    """save_network_results로 저장한 노드/간선 파일(json, jsonl, .gz)에서 그래프 복원"""
+    G = nx.Graph()
+    for node in iter_json_records(find_json_records(output_dir, "nodes")):
+        G.add_node(node['name'], freq=node.get('freq', 0))
+    for edge in iter_json_records(find_json_records(output_dir, "edges")):
+        G.add_edge(edge['source'], edge['target'], weight=edge.get('weight', 0))
+    return G
+
+
+class NetworkIndex:
+    """CSR 인접 인덱스 조회 (배열은 메모리 매핑으로 필요한 행만 읽음)"""
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, VOCAB_FILE), 'r', encoding='utf-8') as f:
+            self.vocab = [line.rstrip('\n') for line in f]
+        self.word_to_id = {word: i for i, word in enumerate(self.vocab)}
+        self.indptr = np.load(os.path.join(index_dir, INDPTR_FILE), mmap_mode='r')
+        self.indices = np.load(os.path.join(index_dir, INDICES_FILE), mmap_mode='r')
+        self.weights = np.load(os.path.join(index_dir, WEIGHTS_FILE), mmap_mode='r')
+        self.freqs = np.load(os.path.join(index_dir, FREQ_FILE), mmap_mode='r')
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.word_to_id
+
+    def node_id(self, word: str) -> int:
+        if word not in self.word_to_id:
+            raise KeyError(f"Unknown keyword: {word}")
+        return self.word_to_id[word]
+
+    def _row(self, node: int, k: Optional[int] = None):
+        start, end = int(self.indptr[node]), int(self.indptr[node + 1])
+        if k is not None:
+            end = min(end, start + k)
+        return self.indices[start:end], self.weights[start:end]
+
+    def _weight(self, weight) -> float:
+        weight = float(weight)
+        return int(weight) if weight.is_integer() else weight
+
+    def neighbors(self, word: str, k: Optional[int] = 10) -> List[Dict]:
+        """가중치 상위 k개 이웃"""
+        ids, weights = self._row(self.node_id(word), k)
+        return [{'word': self.vocab[i], 'weight': self._weight(w)} for i, w in zip(ids.tolist(), weights.tolist())]
+
+    def k_hop(self, word: str, hops: int = 2, k: Optional[int] = None) -> Dict[str, int]:
+        """hops 이내에 닿는 키워드와 거리 (k가 있으면 노드마다 상위 k개 이웃으로만 확장)"""
+        start = self.node_id(word)
+        distance = {start: 0}
+        frontier = deque([start])
+        while frontier:
+            node = frontier.popleft()
+            if distance[node] >= hops:
+                continue
+            ids, _ = self._row(node, k)
+            for neighbor in ids.tolist():
+                if neighbor not in distance:
+                    distance[neighbor] = distance[node] + 1
+                    frontier.append(neighbor)
+        return {self.vocab[node]: d for node, d in distance.items()}
+
+    def ego_network(self, word: str, radius: int = 1, k: Optional[int] = None) -> Dict:
+        """키워드 중심 서브네트워크: radius 이내 노드와 그 사이의 모든 간선"""
+        members = {self.word_to_id[w] for w in self.k_hop(word, radius, k)}
+        edges = []
+        for node in members:
+            ids, weights = self._row(node)
+            for neighbor, weight in zip(ids.tolist(), weights.tolist()):
+                if node < neighbor and neighbor in members:
+                    edges.append({'source': self.vocab[node], 'target': self.vocab[neighbor],
+                                  'weight': self._weight(weight)})
+        nodes = [{'name': self.vocab[node], 'freq': int(self.freqs[node])} for node in sorted(members)]
+        return {'center': word, 'nodes': nodes, 'edges': edges}
+
+    def ego_graph(self, word: str, radius: int = 1, k: Optional[int] = None) -> nx.Graph:
+        """ego_network 결과를 networkx 그래프로 반환 (draw_enhanced_network 등에 바로 사용)"""
+        sub = self.ego_network(word, radius, k)
+        G = nx.Graph()
+        G.add_nodes_from((node['name'], {'freq': node['freq']}) for node in sub['nodes'])
+        G.add_weighted_edges_from((e['source'], e['target'], e['weight']) for e in sub['edges'])
+        return G
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공동출현 네트워크 인접 인덱스")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="결과 폴더(nodes/edges 파일)에서 인덱스 생성")
+    build.add_argument("results_dir")
+    build.add_argument("--index-dir", help="기본값: <results_dir>/index")
+
+    for name, help_text in (("neighbors", "상위 이웃"), ("ego", "중심 서브네트워크"), ("khop", "k-hop 키워드")):
+        query = subparsers.add_parser(name, help=help_text)
+        query.add_argument("index_dir")
+        query.add_argument("word")
+        query.add_argument("-k", type=int, default=None, help="노드별 상위 이웃 수")
+        query.add_argument("--radius", "--hops", dest="radius", type=int, default=1 if name == "ego" else 2)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        index_dir = args.index_dir or os.path.join(args.results_dir, "index")
+        build_network_index(load_saved_network(args.results_dir), index_dir)
+        return
+
+    index = NetworkIndex(args.index_dir)
+    try:
+        if args.command == "neighbors":
+            result = index.neighbors(args.word, args.k or 10)
+        elif args.command == "ego":
+            result = index.ego_network(args.word, args.radius, args.k)
+        else:
+            result = index.k_hop(args.word, args.radius, args.k)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
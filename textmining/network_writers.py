@@ -0,0 +1,237 @@
+import os
+import gzip
+import json
+import time
+import logging
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+import networkx as nx
+import numpy as np
+
+# 노드/간선 JSON 형식
+#   json    - json.dump(..., indent=2)와 바이트 단위로 같은 들여쓴 배열 (기본값)
+#   compact - 공백 없는 한 줄 배열
+#   jsonl   - 한 줄에 레코드 하나 (nodes.jsonl / edges.jsonl)
+JSON_FORMATS = ("json", "compact", "jsonl")
+# 레코드 파일을 찾는 순서
+JSON_RECORD_EXTENSIONS = (".json", ".jsonl", ".json.gz", ".jsonl.gz")
+
+GEXF_NAMESPACE = "http://www.gexf.net/1.2draft"
+XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
+GEXF_SCHEMA_LOCATION = "http://www.gexf.net/1.2draft http://www.gexf.net/1.2draft/gexf.xsd"
+
+# nx.write_gexf의 속성 타입 (type(value)로 찾고, numpy 스칼라는 int/float)
+_GEXF_TYPES = {bool: "boolean", int: "long", float: "double", str: "string"}
+# nx.write_gexf가 attvalue가 아닌 별도 규칙으로 쓰는 키 (있으면 nx.write_gexf로 저장)
+_SPECIAL_NODE_KEYS = {"id", "label", "pid", "start", "end", "viz", "parents", "spells", "slices"}
+_SPECIAL_EDGE_KEYS = {"id", "label", "type", "start", "end", "viz", "spells", "slices", "key"}
+_SPECIAL_FLOATS = {"inf": "INF", "nan": "NaN", "-inf": "-INF"}
+
+# (속성 이름 -> (속성 id, GEXF 타입)), 발견 순서
+GexfAttributes = Dict[str, Tuple[str, str]]
+
+
+def open_text_output(path: str, newline: Optional[str] = None) -> TextIO:
+    """쓰기용 텍스트 파일 (경로가 .gz로 끝나면 gzip 압축)"""
+    if path.endswith(".gz"):
+        return gzip.open(path, 'wt', compresslevel=6, encoding='utf-8', newline=newline)
+    return open(path, 'w', encoding='utf-8', newline=newline)
+
+
+def open_text_input(path: str) -> TextIO:
+    """읽기용 텍스트 파일 (경로가 .gz로 끝나면 gzip 해제)"""
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def json_records_path(output_dir: str, stem: str, json_format: str = "json", compress: bool = False) -> str:
+    """형식/압축에 따른 레코드 파일 경로 (예: nodes.json, edges.jsonl.gz)"""
+    if json_format not in JSON_FORMATS:
+        raise ValueError(f"Unknown JSON format: {json_format} (choose from {JSON_FORMATS})")
+    extension = ".jsonl" if json_format == "jsonl" else ".json"
+    return os.path.join(output_dir, stem + extension + (".gz" if compress else ""))
+
+
+def find_json_records(output_dir: str, stem: str) -> str:
+    """저장된 레코드 파일 찾기 (nodes.json, nodes.jsonl 및 .gz 순)"""
+    for extension in JSON_RECORD_EXTENSIONS:
+        path = os.path.join(output_dir, stem + extension)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No {stem}.json or {stem}.jsonl in {output_dir}")
+
+
+def remove_stale_outputs(path: str, stem: str, extensions: Iterable[str]):
+    """같은 결과의 다른 형식 파일 삭제 (형식을 바꿔 다시 저장했을 때 이전 파일이 읽히지 않도록)"""
+    output_dir = os.path.dirname(path)
+    for extension in extensions:
+        stale = os.path.join(output_dir, stem + extension)
+        if stale != path and os.path.exists(stale):
+            os.remove(stale)
+
+
+def write_json_records(path: str, records: Iterable[Dict], json_format: str = "json") -> int:
+    """레코드를 하나씩 직렬화해 기록 (전체 리스트를 만들지 않음), 기록한 레코드 수 반환"""
+    if json_format not in JSON_FORMATS:
+        raise ValueError(f"Unknown JSON format: {json_format} (choose from {JSON_FORMATS})")
+
+    count = 0
+    with open_text_output(path) as f:
+        if json_format == "jsonl":
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+                count += 1
+            return count
+
+        for record in records:
+            f.write(',' if count else '[')
+            if json_format == "json":
+                # json.dump(records, indent=2)의 배열 안 항목과 같은 들여쓰기
+                text = json.dumps(record, ensure_ascii=False, indent=2)
+                f.write('\n  ' + text.replace('\n', '\n  '))
+            else:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            count += 1
+        f.write(('\n]' if json_format == "json" else ']') if count else '[]')
+    return count
+
+
+def iter_json_records(path: str) -> Iterator[Dict]:
+    """write_json_records로 저장한 레코드 순회 (.jsonl은 한 줄씩 읽음)"""
+    with open_text_input(path) as f:
+        if path.endswith((".jsonl", ".jsonl.gz")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def _escape_attribute(text: str) -> str:
+    """ElementTree와 같은 XML 속성 값 이스케이프"""
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+    return text.replace('\r', '&#13;').replace('\n', '&#10;').replace('\t', '&#09;')
+
+
+def _gexf_type(value) -> Optional[str]:
+    gexf_type = _GEXF_TYPES.get(type(value))
+    if gexf_type is None:
+        if isinstance(value, np.integer):
+            return "int"
+        if isinstance(value, np.floating):
+            return "float"
+    return gexf_type
+
+
+def _gexf_value(value) -> str:
+    if isinstance(value, bool):
+        return str(value).lower()
+    text = str(value)
+    if type(value) is float:
+        text = _SPECIAL_FLOATS.get(text, text)
+    return text
+
+
+def gexf_attributes(G: nx.Graph) -> Optional[Tuple[GexfAttributes, GexfAttributes]]:
+    """스트리밍으로 쓸 노드/간선 속성 선언 (nx.write_gexf와 같은 id/타입)
+
+    스트리밍 writer가 다루지 않는 그래프(방향/멀티 그래프, 동적 속성, viz 등)면 None.
+    """
+    if G.is_directed() or G.is_multigraph() or G.graph.get("mode") == "dynamic" \
+            or "node_default" in G.graph or "edge_default" in G.graph:
+        return None
+
+    next_id = 0
+    node_attributes: GexfAttributes = {}
+    edge_attributes: GexfAttributes = {}
+    for attributes, special, records in (
+            (node_attributes, _SPECIAL_NODE_KEYS, (data for _, data in G.nodes(data=True))),
+            (edge_attributes, _SPECIAL_EDGE_KEYS, (data for _, _, data in G.edges(data=True)))):
+        for data in records:
+            for key, value in data.items():
+                # 간선 weight는 attvalue가 아니라 edge 요소의 속성으로 쓴다
+                if key in attributes or (attributes is edge_attributes and key == "weight"):
+                    continue
+                gexf_type = _gexf_type(value)
+                if key in special or gexf_type is None:
+                    return None
+                attributes[key] = (str(next_id), gexf_type)
+                next_id += 1
+    return node_attributes, edge_attributes
+
+
+def _write_attvalues(f: TextIO, data: Iterable[Tuple[str, object]], attributes: GexfAttributes, indent: str):
+    f.write(f'{indent}  <attvalues>\n')
+    for key, value in data:
+        f.write(f'{indent}    <attvalue for="{attributes[key][0]}" value="{_escape_attribute(_gexf_value(value))}" />\n')
+    f.write(f'{indent}  </attvalues>\n')
+
+
+def write_gexf_stream(path: str, nodes: Iterable[Tuple[object, Dict]], edges: Iterable[Tuple[object, object, Dict]],
+                      node_attributes: GexfAttributes, edge_attributes: GexfAttributes, name: str = ""):
+    """노드/간선 반복자에서 GEXF를 바로 기록 (XML 트리를 만들지 않음)
+
+    출력은 같은 그래프에 대한 nx.write_gexf(prettyprint)와 바이트 단위로 같다.
+    """
+    with open_text_output(path, newline='') as f:
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        f.write(f'<gexf xmlns="{GEXF_NAMESPACE}" xmlns:xsi="{XSI_NAMESPACE}" '
+                f'xsi:schemaLocation="{GEXF_SCHEMA_LOCATION}" version="1.2">\n')
+        f.write(f'  <meta lastmodifieddate="{time.strftime("%Y-%m-%d")}">\n'
+                f'    <creator>NetworkX {nx.__version__}</creator>\n'
+                f'  </meta>\n')
+        f.write(f'  <graph defaultedgetype="undirected" mode="static" name="{_escape_attribute(str(name))}">\n')
+
+        # nx.write_gexf는 속성 선언을 graph 맨 앞에 끼워 넣으므로 간선 속성이 노드 속성보다 먼저 나온다
+        for class_name, attributes in (("edge", edge_attributes), ("node", node_attributes)):
+            if attributes:
+                f.write(f'    <attributes mode="static" class="{class_name}">\n')
+                for title, (attribute_id, gexf_type) in attributes.items():
+                    f.write(f'      <attribute id="{attribute_id}" title="{_escape_attribute(title)}" '
+                            f'type="{gexf_type}" />\n')
+                f.write('    </attributes>\n')
+
+        n_nodes = 0
+        for node, data in nodes:
+            if not n_nodes:
+                f.write('    <nodes>\n')
+            n_nodes += 1
+            node_id = _escape_attribute(str(node))
+            if not data:
+                f.write(f'      <node id="{node_id}" label="{node_id}" />\n')
+                continue
+            f.write(f'      <node id="{node_id}" label="{node_id}">\n')
+            _write_attvalues(f, data.items(), node_attributes, '      ')
+            f.write('      </node>\n')
+        f.write('    </nodes>\n' if n_nodes else '    <nodes />\n')
+
+        n_edges = 0
+        for source, target, data in edges:
+            if not n_edges:
+                f.write('    <edges>\n')
+            element = f'      <edge source="{_escape_attribute(str(source))}" ' \
+                      f'target="{_escape_attribute(str(target))}" id="{n_edges}"'
+            if "weight" in data:
+                element += f' weight="{_escape_attribute(str(data["weight"]))}"'
+            n_edges += 1
+            values = [(key, value) for key, value in data.items() if key != "weight"]
+            if not values:
+                f.write(element + ' />\n')
+                continue
+            f.write(element + '>\n')
+            _write_attvalues(f, values, edge_attributes, '      ')
+            f.write('      </edge>\n')
+        f.write('    </edges>\n' if n_edges else '    <edges />\n')
+
+        f.write('  </graph>\n</gexf>\n')
+
+
+def write_graph_gexf(G: nx.Graph, path: str):
+    """그래프를 GEXF로 저장 (가능하면 스트리밍, 아니면 nx.write_gexf)"""
+    attributes = gexf_attributes(G)
+    if attributes is None:
+        logging.info("Graph uses GEXF features not supported by the streaming writer; using nx.write_gexf")
+        nx.write_gexf(G, path)
+        return
+    write_gexf_stream(path, G.nodes(data=True), G.edges(data=True), *attributes, name=G.graph.get("name", ""))
@@ -0,0 +1,137 @@
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from token_store import file_fingerprint
+
+if TYPE_CHECKING:
+    # TMconfig가 DEFAULT_DENY_PATTERNS를 가져가므로 실행 시에는 import하지 않는다 (순환 import 방지)
+    from TMconfig import AnalysisConfig
+
+# 기본 거부 패턴: "가1", "나123" 같은 한 글자 + 숫자
+DEFAULT_DENY_PATTERNS = (r'^[가-힣]{1}[0-9]+$',)
+
+# 설정별로 재사용할 컴파일된 필터 수
+MAX_CACHED_FILTERS = 8
+
+# 필터 하나가 기억하는 표면형 판정 수 (넘으면 비우고 다시 쌓는다)
+MAX_JUDGED_WORDS = 200_000
+
+_MISSING = object()
+
+
+def load_synonyms(synonyms_path: Optional[str]) -> Dict[str, str]:
+    """동의어/병합 사전 로드 (한 줄에 "단어,대표어" 또는 "단어<TAB>대표어")"""
+    synonyms = {}
+    if synonyms_path and os.path.exists(synonyms_path):
+        with open(synonyms_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = re.split(r'[\t,]', line.strip(), maxsplit=1)
+                if len(parts) == 2 and parts[0].strip() and parts[1].strip():
+                    synonyms[parts[0].strip()] = parts[1].strip()
+        logging.info(f"Loaded {len(synonyms)} synonyms.")
+    elif synonyms_path:
+        logging.info("Synonyms file not found.")
+    return synonyms
+
+
+class NounFilter:
+    """설정 기반 규칙을 한 번 컴파일해 명사 배치를 한 번에 거르는 필터
+
+    동의어 사전으로 대표어로 바꾼 뒤 길이, 불용어, 단일 문자 반복, 거부 정규식,
+    추가 규칙(add_rule) 순으로 판정하며, 판정 결과는 표면형별로 캐시되어
+    같은 단어는 한 번만 검사한다. 캐시는 max_cached_words개를 넘으면 비운다.
+    """
+
+    def __init__(self, min_length: int, max_length: int, stopwords: Set[str] = frozenset(),
+                 deny_patterns: Sequence[str] = DEFAULT_DENY_PATTERNS,
+                 synonyms: Optional[Dict[str, str]] = None,
+                 max_cached_words: int = MAX_JUDGED_WORDS):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.stopwords = stopwords
+        self.synonyms = synonyms or {}
+        self.deny_regex = re.compile('|'.join(f'(?:{p})' for p in deny_patterns)) if deny_patterns else None
+        self.rules: List[Callable[[str], bool]] = []
+        self.max_cached_words = max_cached_words
+        self._cache: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def from_config(cls, config: "AnalysisConfig", stopwords: Set[str]) -> "NounFilter":
+        return cls(config.min_word_length, config.max_word_length, stopwords,
+                   config.deny_patterns, load_synonyms(config.synonyms_file))
+
+    def add_rule(self, rule: Callable[[str], bool]):
+        """단어를 남길지(True) 판정하는 규칙 추가"""
+        self.rules.append(rule)
+        self._cache.clear()
+
+    def judge(self, word: str) -> Optional[str]:
+        """남길 단어면 (대표어로 바꾼) 단어, 버릴 단어면 None"""
+        word = self.synonyms.get(word, word)
+
+        # 길이 조건
+        if not self.min_length <= len(word) <= self.max_length:
+            return None
+        # 불용어 체크
+        if word in self.stopwords:
+            return None
+        # 단일 문자 반복 제거 (예: "aaaa", "1111")
+        if word and word.count(word[0]) == len(word):
+            return None
+        # 의미없는 패턴 제거
+        if self.deny_regex is not None and self.deny_regex.match(word):
+            return None
+        for rule in self.rules:
+            if not rule(word):
+                return None
+        return word
+
+    def filter(self, nouns: Iterable[str]) -> List[str]:
+        """명사 배치 필터링 (고유 표면형마다 한 번만 judge)"""
+        cache = self._cache
+        # 서비스처럼 필터가 오래 공유되면 본 표면형이 끝없이 쌓이므로 상한을 넘으면 비운다
+        if len(cache) > self.max_cached_words:
+            cache.clear()
+        judge = self.judge
+        filtered = []
+        append = filtered.append
+        for word in nouns:
+            result = cache.get(word, _MISSING)
+            if result is _MISSING:
+                result = cache[word] = judge(word)
+            if result is not None:
+                append(result)
+        return filtered
+
+
+_filter_cache: "OrderedDict[Tuple, NounFilter]" = OrderedDict()
+_filter_cache_lock = threading.Lock()
+
+
+def cached_noun_filter(config: "AnalysisConfig", stopwords: Set[str]) -> NounFilter:
+    """설정과 불용어 집합이 같으면 컴파일된 필터(판정 캐시 포함)를 재사용
+
+    서비스처럼 같은 설정의 작업이 반복될 때 정규식 컴파일과 동의어 사전 로드를 한 번만 한다.
+    동의어 파일이 바뀌면(file_fingerprint의 크기/수정 시각) 다시 만든다. 공유되는 필터이므로 add_rule이 필요하면
+    NounFilter.from_config로 따로 만든다.
+    """
+    key = (config.min_word_length, config.max_word_length, id(stopwords),
+           tuple(config.deny_patterns), tuple(file_fingerprint(config.synonyms_file) or ()))
+    with _filter_cache_lock:
+        noun_filter = _filter_cache.get(key)
+        # id는 필터가 불용어 집합을 참조하는 동안만 유일하므로 같은 객체인지 한 번 더 확인
+        if noun_filter is not None and noun_filter.stopwords is stopwords:
+            _filter_cache.move_to_end(key)
+            return noun_filter
+
+    noun_filter = NounFilter.from_config(config, stopwords)
+    with _filter_cache_lock:
+        _filter_cache[key] = noun_filter
+        _filter_cache.move_to_end(key)
+        while len(_filter_cache) > MAX_CACHED_FILTERS:
+            _filter_cache.popitem(last=False)
+    return noun_filter
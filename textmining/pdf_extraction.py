@@ -0,0 +1,118 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Tuple
+
+import fitz
+
+# 기본 TEXTFLAGS_TEXT에서 합자/공백 보존을 뺀 플래그
+# 속도 때문이 아니라 출력 때문에 쓴다 (300쪽 기준 get_text 시간 차이는 측정 오차 안):
+# 합자(ﬁ 등)는 풀어 써야 명사 추출/불용어와 맞고, 공백은 전처리에서 어차피 하나로 합친다.
+LEAN_TEXT_FLAGS = fitz.TEXT_MEDIABOX_CLIP | fitz.TEXT_CID_FOR_UNKNOWN_UNICODE
+
+
+@dataclass
+class PageRangeResult:
+    """페이지 구간 하나의 추출 결과"""
+    pdf_path: str
+    start: int
+    stop: int
+    text: str
+    pages: int = 0
+    skipped_pages: int = 0
+    error: str = ""
+    opened: bool = True  # False면 파일을 열지 못해 구간을 나누지도 못한 결과
+
+
+@dataclass
+class ExtractionStats:
+    """추출 통계"""
+    files: int = 0
+    ranges: int = 0
+    pages: int = 0
+    skipped_pages: int = 0
+    errors: int = 0
+    failed_files: int = 0
+
+    def add(self, result: PageRangeResult):
+        self.errors += bool(result.error)
+        if not result.opened:
+            self.failed_files += 1
+            return
+        self.ranges += 1
+        self.pages += result.pages
+        self.skipped_pages += result.skipped_pages
+
+
+def plan_page_ranges(pdf_paths: Iterable[str], pages_per_shard: int) -> Iterator[Tuple[str, int, int, str]]:
+    """PDF마다 (경로, 시작 페이지, 끝 페이지, 오류) 구간으로 분할 (pages_per_shard <= 0이면 문서 전체 1구간)
+
+    열 수 없는 파일은 오류 메시지를 담은 빈 구간 하나로 내보내 통계에 잡히게 한다.
+    """
+    for pdf_path in pdf_paths:
+        try:
+            with fitz.open(pdf_path) as doc:
+                page_count = doc.page_count
+        except Exception as e:
+            yield pdf_path, 0, 0, f"Error opening {pdf_path}: {e}"
+            continue
+
+        step = pages_per_shard if pages_per_shard > 0 else max(page_count, 1)
+        for start in range(0, max(page_count, 1), step):
+            yield pdf_path, start, min(start + step, page_count), ""
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int,
+                       flags: int = LEAN_TEXT_FLAGS) -> PageRangeResult:
+    """페이지 구간의 텍스트 추출 (텍스트 레이어가 없는 페이지는 get_text 없이 건너뜀)"""
+    result = PageRangeResult(pdf_path, start, stop, "")
+    chunks = []
+    try:
+        with fitz.open(pdf_path) as doc:
+            for page_num in range(start, stop):
+                page = doc.load_page(page_num)
+                result.pages += 1
+                # 폰트가 하나도 없으면 이미지뿐인 페이지이므로 텍스트가 나올 수 없다
+                if not page.get_fonts():
+                    result.skipped_pages += 1
+                    continue
+                chunks.append(page.get_text("text", flags=flags))
+    except Exception as e:
+        result.error = str(e)
+    result.text = ''.join(chunks)
+    return result
+
+
+def iter_extracted_ranges(pdf_paths: Iterable[str], workers: int = 1, pages_per_shard: int = 0,
+                          flags: int = LEAN_TEXT_FLAGS) -> Iterator[PageRangeResult]:
+    """페이지 구간별 추출 결과를 문서/페이지 순서대로 순회
+
+    workers > 1이면 구간을 별도 프로세스에서 추출한다. 메모리를 위해 동시에
+    진행 중인 구간은 workers * 2개로 제한하며, 순회를 중단하면 남은 작업은 취소된다.
+    """
+    ranges = plan_page_ranges(pdf_paths, pages_per_shard)
+    if workers <= 1:
+        for pdf_path, start, stop, error in ranges:
+            if error:
+                yield PageRangeResult(pdf_path, start, stop, "", error=error, opened=False)
+                continue
+            yield extract_page_range(pdf_path, start, stop, flags)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    inflight = deque()
+    try:
+        for pdf_path, start, stop, error in ranges:
+            if error:
+                # 순서를 지키도록 완료된 Future로 같은 큐에 넣는다
+                failed = Future()
+                failed.set_result(PageRangeResult(pdf_path, start, stop, "", error=error, opened=False))
+                inflight.append(failed)
+            else:
+                inflight.append(pool.submit(extract_page_range, pdf_path, start, stop, flags))
+            if len(inflight) >= workers * 2:
+                yield inflight.popleft().result()
+        while inflight:
+            yield inflight.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
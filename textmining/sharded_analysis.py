@@ -0,0 +1,323 @@
+"""
+여러 머신에 나누어 실행하는 샤드 단위 map/reduce 분석
+
+PDF 목록(이름순)을 연속 구간으로 나누어 샤드마다 따로 처리한 뒤 병합한다.
+낮은 빈도 단어를 먼저 지우고 윈도우를 세므로 간선 계산에는 전체 빈도가 필요하다.
+따라서 map(토큰화) -> edges(간선 계산) 두 라운드를 거친 뒤 reduce로 병합한다.
+각 라운드의 샤드들은 서로 독립이라 동시에 실행할 수 있다.
+
+    python sharded_analysis.py map   --work-dir ./shards --num-shards 3 --shard 0 --pdf-folder ./pdfs
+    python sharded_analysis.py edges --work-dir ./shards --num-shards 3 --shard 0 --pdf-folder ./pdfs
+    python sharded_analysis.py reduce --work-dir ./shards --num-shards 3 --pdf-folder ./pdfs --output-dir ./results
+
+샤드 경계를 걸치는 윈도우는 reduce에서 각 샤드의 머리/꼬리 토큰으로 센다.
+그래서 결과(어휘 순서, 노드 빈도, 간선 가중치)는 한 번에 실행한 결과와 같다.
+단, char_limit은 샤드마다 따로 적용된다.
+"""
+
+import os
+import json
+import logging
+import argparse
+from collections import Counter
+from dataclasses import replace
+from typing import Dict, List, Tuple
+
+import networkx as nx
+import numpy as np
+
+from TMconfig import AnalysisConfig
+from token_stream import TOKEN_DTYPE
+from token_store import VOCAB_FILE, TokenStoreWriter, open_token_store, read_token_store_meta
+from edge_counting import (COUNT_DTYPE, KEY_DTYPE, count_window_pairs, iter_window_buffers,
+                           iter_window_pair_counts, merge_block_size, merge_counts, merge_sorted_runs)
+from keyword_pdf_kor import EnhancedKeywordAnalyzer
+from build_cooccurrence_network import EnhancedCooccurrenceNetwork
+
+# 샤드 디렉터리 구성
+#   token_store/      - 샤드 문서의 토큰 저장소 (샤드 자체 어휘 id)
+#   term_counts.npy   - 샤드 어휘 id별 빈도 (map)
+#   edge_keys.i64     - 전체 어휘 기준 간선 키, 정렬/중복 없음 (edges)
+#   edge_counts.i64   - 간선 키별 빈도 (edges)
+#   seam.npz          - 필터링 후 처음/마지막 window_size - 1개 토큰 (edges)
+#   edges.json        - 간선 계산 조건 (마지막에 기록 = 완료 표시)
+TOKEN_STORE_DIR = "token_store"
+TERM_COUNTS_FILE = "term_counts.npy"
+EDGE_KEYS_FILE = "edge_keys.i64"
+EDGE_COUNTS_FILE = "edge_counts.i64"
+SEAM_FILE = "seam.npz"
+EDGES_META_FILE = "edges.json"
+
+# reduce에서 메모리 예산이 없을 때 run마다 한 번에 병합할 간선 수
+DEFAULT_MERGE_BLOCK = 1 << 20
+
+
+def split_pdf_files(pdf_paths: List[str], num_shards: int) -> List[List[str]]:
+    """PDF 목록을 순서를 유지한 채 파일 크기가 비슷한 연속 구간 num_shards개로 분할"""
+    sizes = np.array([os.path.getsize(path) for path in pdf_paths], dtype=np.float64)
+    ends = np.cumsum(sizes)
+    total = ends[-1] if len(ends) else 0.0
+    # 파일 끝 누적 크기가 구간 경계에 가장 먼저 닿는 위치에서 자른다
+    bounds = [0] + [int(np.searchsorted(ends, total * i / num_shards, side='left')) + 1
+                    for i in range(1, num_shards)] + [len(pdf_paths)]
+    bounds = np.maximum.accumulate(np.minimum(bounds, len(pdf_paths)))
+    return [pdf_paths[bounds[i]:bounds[i + 1]] for i in range(num_shards)]
+
+
+class ShardedAnalysis:
+    """샤드별 토큰화/간선 계산과 병합"""
+
+    def __init__(self, config: AnalysisConfig, work_dir: str, num_shards: int, okt=None):
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        self.config = config
+        self.work_dir = work_dir
+        self.num_shards = num_shards
+        self.okt = okt
+
+    def _check_shard(self, shard: int):
+        if not 0 <= shard < self.num_shards:
+            raise ValueError(f"Shard {shard} out of range (num_shards={self.num_shards})")
+
+    def shard_dir(self, shard: int) -> str:
+        self._check_shard(shard)
+        return os.path.join(self.work_dir, f"shard-{shard:05d}")
+
+    def shard_pdf_files(self, shard: int) -> List[str]:
+        """이 샤드가 맡을 PDF (단일 실행과 같은 이름순 목록의 연속 구간)"""
+        self._check_shard(shard)
+        analyzer = EnhancedKeywordAnalyzer(replace(self.config, pdf_files=None))
+        return split_pdf_files(analyzer.list_pdf_files(self.config.pdf_folder), self.num_shards)[shard]
+
+    # 1. map: 샤드 문서 토큰화와 단어 빈도
+    def map_shard(self, shard: int):
+        shard_dir = self.shard_dir(shard)
+        pdf_files = self.shard_pdf_files(shard)
+        config = replace(self.config, pdf_files=tuple(pdf_files), use_token_store=True,
+                         token_store_dir=os.path.join(shard_dir, TOKEN_STORE_DIR))
+        analyzer = EnhancedKeywordAnalyzer(config, okt=self.okt)
+        logging.info(f"Shard {shard}/{self.num_shards}: {len(pdf_files)} PDF files")
+
+        if pdf_files:
+            tokens = analyzer.tokenize()
+        else:
+            # 빈 pdf_files는 폴더 전체를 뜻하므로 빈 저장소를 직접 만든다
+            tokens = TokenStoreWriter(analyzer.token_store_dir(), analyzer.token_store_source()).build()
+
+        np.save(os.path.join(shard_dir, TERM_COUNTS_FILE), tokens.counts(config.scan_chunk_size))
+        logging.info(f"Shard {shard} mapped: {len(tokens)} tokens, {len(tokens.vocab)} words")
+
+    def _load_shard_vocab(self, shard: int) -> Tuple[List[str], np.ndarray]:
+        shard_dir = self.shard_dir(shard)
+        store_dir = os.path.join(shard_dir, TOKEN_STORE_DIR)
+        counts_path = os.path.join(shard_dir, TERM_COUNTS_FILE)
+        if read_token_store_meta(store_dir) is None or not os.path.exists(counts_path):
+            raise FileNotFoundError(f"Shard {shard} has not been mapped: {shard_dir}")
+        with open(os.path.join(store_dir, VOCAB_FILE), 'r', encoding='utf-8') as f:
+            vocab = [line.rstrip('\n') for line in f]
+        return vocab, np.load(counts_path)
+
+    def merge_vocab(self) -> Tuple[List[str], np.ndarray, List[np.ndarray]]:
+        """샤드 어휘를 순서대로 합친 전체 어휘, 전체 빈도, 샤드별 id 변환표
+
+        샤드 어휘는 등장 순서이므로, 샤드 순서대로 새 단어를 붙이면 단일 실행의 어휘 순서와 같다.
+        """
+        vocab: List[str] = []
+        word_to_id: Dict[str, int] = {}
+        remaps, shard_counts = [], []
+        for shard in range(self.num_shards):
+            shard_vocab, counts = self._load_shard_vocab(shard)
+            remap = np.empty(len(shard_vocab), dtype=TOKEN_DTYPE)
+            for i, word in enumerate(shard_vocab):
+                word_id = word_to_id.get(word)
+                if word_id is None:
+                    word_id = word_to_id[word] = len(vocab)
+                    vocab.append(word)
+                remap[i] = word_id
+            remaps.append(remap)
+            shard_counts.append(counts)
+
+        frequencies = np.zeros(len(vocab), dtype=np.int64)
+        for remap, counts in zip(remaps, shard_counts):
+            np.add.at(frequencies, remap, counts)
+        return vocab, frequencies, remaps
+
+    def _keep_mask(self, frequencies: np.ndarray) -> np.ndarray:
+        return frequencies >= max(self.config.min_word_freq, 1)
+
+    # 2. edges: 전체 빈도로 거른 샤드 토큰의 윈도우 공동출현
+    def count_shard_edges(self, shard: int):
+        config = self.config
+        shard_dir = self.shard_dir(shard)
+        vocab, frequencies, remaps = self.merge_vocab()
+        keep = self._keep_mask(frequencies)
+        n_vocab, window_size = len(vocab), config.window_size
+        # 다시 세는 동안 이전 결과가 완료된 것으로 보이지 않도록 완료 표시부터 지운다
+        meta_path = os.path.join(shard_dir, EDGES_META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        tokens = open_token_store(os.path.join(shard_dir, TOKEN_STORE_DIR))
+        network = EnhancedCooccurrenceNetwork(config)
+        edge_table = network.new_edge_table()
+        scan_chunk = edge_table.scan_chunk(config.scan_chunk_size)
+        chunks = (remaps[shard][chunk] for chunk in tokens.iter_chunks(scan_chunk))
+        chunk_windows = edge_table.window_chunk(window_size)
+
+        head_parts, n_kept = [], 0
+        tail = np.zeros(0, dtype=TOKEN_DTYPE)
+        for filtered, buffer in iter_window_buffers(chunks, keep, window_size):
+            for keys, counts in iter_window_pair_counts(buffer, window_size, n_vocab, chunk_windows):
+                edge_table.add(keys, counts)
+            head_parts.append(filtered[:max(window_size - 1 - n_kept, 0)])
+            n_kept += len(filtered)
+            tail = buffer[max(len(buffer) - window_size + 1, 0):]
+        head = np.concatenate(head_parts) if head_parts else np.zeros(0, dtype=TOKEN_DTYPE)
+        network.log_edge_table(edge_table)
+
+        # 간선은 키 순서 블록으로 바로 파일에 이어 쓴다
+        n_edges = 0
+        with open(os.path.join(shard_dir, EDGE_KEYS_FILE), 'wb') as keys_file, \
+                open(os.path.join(shard_dir, EDGE_COUNTS_FILE), 'wb') as counts_file:
+            for keys, counts in edge_table.iter_result():
+                keys.astype(KEY_DTYPE, copy=False).tofile(keys_file)
+                counts.astype(COUNT_DTYPE, copy=False).tofile(counts_file)
+                n_edges += len(keys)
+        np.savez(os.path.join(shard_dir, SEAM_FILE), head=head, tail=tail)
+
+        meta = {'n_vocab': n_vocab, 'n_edges': n_edges, 'n_kept': n_kept,
+                'window_size': window_size, 'min_word_freq': config.min_word_freq}
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        logging.info(f"Shard {shard} edges counted: {n_kept} tokens kept, {n_edges} edge candidates")
+
+    def _load_shard_edges(self, shard: int, n_vocab: int) -> Tuple[Dict, np.ndarray, np.ndarray]:
+        shard_dir = self.shard_dir(shard)
+        meta_path = os.path.join(shard_dir, EDGES_META_FILE)
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"Shard {shard} edges have not been counted: {shard_dir}")
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        expected = {'n_vocab': n_vocab, 'window_size': self.config.window_size,
+                    'min_word_freq': self.config.min_word_freq}
+        mismatched = {key: meta.get(key) for key, value in expected.items() if meta.get(key) != value}
+        if mismatched:
+            raise ValueError(f"Shard {shard} edges were counted with different settings: {mismatched}")
+
+        if meta['n_edges'] == 0:
+            return meta, np.zeros(0, dtype=KEY_DTYPE), np.zeros(0, dtype=COUNT_DTYPE)
+        keys = np.memmap(os.path.join(shard_dir, EDGE_KEYS_FILE), dtype=KEY_DTYPE, mode='r',
+                         shape=(meta['n_edges'],))
+        counts = np.memmap(os.path.join(shard_dir, EDGE_COUNTS_FILE), dtype=COUNT_DTYPE, mode='r',
+                           shape=(meta['n_edges'],))
+        return meta, keys, counts
+
+    def count_seam_edges(self, n_vocab: int) -> Tuple[np.ndarray, np.ndarray]:
+        """샤드 경계를 걸치는 윈도우의 공동출현
+
+        직전 샤드들의 마지막 window_size - 1개 토큰(carry) 뒤에 다음 샤드의 머리를 붙이고,
+        carry에서 시작하는 윈도우만 센다 (샤드 안에 완전히 들어가는 윈도우는 샤드에서 이미 셈).
+        토큰이 window_size - 1개 이하인 짧은 샤드는 carry에 통째로 이어 붙여 다음 경계로 넘긴다.
+        """
+        window_size = self.config.window_size
+        carry = np.zeros(0, dtype=TOKEN_DTYPE)
+        parts = []
+        for shard in range(self.num_shards):
+            with open(os.path.join(self.shard_dir(shard), EDGES_META_FILE), 'r', encoding='utf-8') as f:
+                n_kept = json.load(f)['n_kept']
+            with np.load(os.path.join(self.shard_dir(shard), SEAM_FILE)) as seam:
+                head, tail = seam['head'], seam['tail']
+
+            buffer = np.concatenate([carry, head])
+            parts.append(count_window_pairs(buffer[:len(carry) + window_size - 1], window_size, n_vocab))
+            if n_kept > window_size - 1:
+                buffer = tail
+            carry = buffer[max(len(buffer) - window_size + 1, 0):]
+        return merge_counts(parts)
+
+    # 3. reduce: 어휘/빈도/간선 병합 후 min_word_freq, min_edge_weight 적용
+    def reduce(self) -> Tuple[nx.Graph, Counter]:
+        config = self.config
+        vocab, frequencies, _ = self.merge_vocab()
+        keep = self._keep_mask(frequencies)
+        node_ids = np.flatnonzero(keep)
+
+        runs = [self._load_shard_edges(shard, len(vocab))[1:] for shard in range(self.num_shards)]
+        runs.append(self.count_seam_edges(len(vocab)))
+        # 단계마다 run별 block개씩 읽는다 (메모리 예산이 있으면 SpillingCountTable과 같은 기준)
+        block = DEFAULT_MERGE_BLOCK
+        if config.edge_memory_budget_mb > 0:
+            block = merge_block_size(config.edge_memory_budget_mb * 1024 * 1024, len(runs))
+
+        network = EnhancedCooccurrenceNetwork(config)
+        G = network.graph_from_counts(vocab, node_ids, frequencies[node_ids],
+                                      merge_sorted_runs(runs, block, config.min_edge_weight))
+        freq = Counter({vocab[i]: int(frequencies[i]) for i in node_ids})
+        logging.info(f"Reduced {self.num_shards} shards: {len(vocab)} words, {len(freq)} frequent words")
+        return G, freq
+
+
+def run_reduce(config: AnalysisConfig, work_dir: str, num_shards: int) -> Tuple[nx.Graph, Dict, Counter]:
+    """샤드 병합 후 단일 실행과 같은 결과 파일 저장"""
+    os.makedirs(config.output_dir, exist_ok=True)
+    G, freq = ShardedAnalysis(config, work_dir, num_shards).reduce()
+
+    if freq:
+        analyzer = EnhancedKeywordAnalyzer(config)
+        analyzer.create_enhanced_wordcloud(dict(freq.most_common(100)),
+                                           os.path.join(config.output_dir, "wordcloud.png"))
+
+    network = EnhancedCooccurrenceNetwork(config)
+    metrics = network.calculate_network_metrics(G)
+    network.save_network_results(G, metrics, config.output_dir)
+    network.draw_enhanced_network(G, metrics,
+                                  output_path=os.path.join(config.output_dir, "network_visualization.png"))
+    return G, metrics, freq
+
+
+def main():
+    parser = argparse.ArgumentParser(description="샤드 단위 map/reduce 키워드 네트워크 분석")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("map", "샤드 PDF 토큰화"), ("edges", "샤드 간선 계산 (모든 map 완료 후)"),
+                            ("reduce", "샤드 병합과 결과 저장 (모든 edges 완료 후)")):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument("--work-dir", required=True, help="샤드 중간 결과 폴더 (모든 노드에서 공유)")
+        command.add_argument("--num-shards", type=int, required=True)
+        if name != "reduce":
+            command.add_argument("--shard", type=int, required=True, help="0부터 시작하는 샤드 번호")
+        command.add_argument("--pdf-folder", required=True)
+        command.add_argument("--include-subfolders", action="store_true")
+        command.add_argument("--stopwords", help="불용어 파일")
+        command.add_argument("--font-path", default=AnalysisConfig.font_path)
+        command.add_argument("--output-dir", default="./results")
+        command.add_argument("--min-word-freq", type=int, default=AnalysisConfig.min_word_freq)
+        command.add_argument("--window-size", type=int, default=AnalysisConfig.window_size)
+        command.add_argument("--min-edge-weight", type=int, default=AnalysisConfig.min_edge_weight)
+        command.add_argument("--char-limit", type=int, default=AnalysisConfig.char_limit,
+                             help="샤드별 최대 텍스트 길이")
+        command.add_argument("--synonyms", help="동의어/병합 사전 파일")
+        command.add_argument("--deny-pattern", action="append",
+                             help="제외할 명사 정규식 (여러 번 지정 가능, 지정하면 기본 패턴 대체)")
+        command.add_argument("--edge-memory-budget-mb", type=int, default=AnalysisConfig.edge_memory_budget_mb,
+                             help="간선 계산/병합 메모리 예산 (MB, 0이면 제한 없음)")
+    args = parser.parse_args()
+
+    # map/edges/reduce는 같은 설정으로 실행해야 한 번에 실행한 결과와 같다
+    config = AnalysisConfig(pdf_folder=args.pdf_folder, include_subfolders=args.include_subfolders,
+                            stopwords_file=args.stopwords, font_path=args.font_path, output_dir=args.output_dir,
+                            min_word_freq=args.min_word_freq, window_size=args.window_size,
+                            min_edge_weight=args.min_edge_weight, char_limit=args.char_limit,
+                            synonyms_file=args.synonyms,
+                            deny_patterns=tuple(args.deny_pattern or AnalysisConfig.deny_patterns),
+                            edge_memory_budget_mb=args.edge_memory_budget_mb)
+    if args.command == "map":
+        ShardedAnalysis(config, args.work_dir, args.num_shards).map_shard(args.shard)
+    elif args.command == "edges":
+        ShardedAnalysis(config, args.work_dir, args.num_shards).count_shard_edges(args.shard)
+    else:
+        run_reduce(config, args.work_dir, args.num_shards)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
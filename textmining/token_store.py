@@ -0,0 +1,137 @@
+import os
+import json
+import hashlib
+import logging
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from token_stream import TOKEN_DTYPE, TokenStream, TokenStreamBuilder
+
+# 토큰 저장소 디렉터리 구성
+#   ids.i32      - 전체 토큰 id 시퀀스 (int32, 네이티브 바이트 순서)
+#   offsets.i64  - 문서 경계 오프셋 (int64, 문서 수 + 1개)
+#   vocab.txt    - id 순서의 어휘 (한 줄에 한 단어)
+#   meta.json    - 토큰/문서 수, 문서 이름, 생성 조건 (마지막에 기록 = 완료 표시)
+IDS_FILE = "ids.i32"
+OFFSETS_FILE = "offsets.i64"
+VOCAB_FILE = "vocab.txt"
+META_FILE = "meta.json"
+
+# 버퍼에 이만큼 쌓이면 ids 파일에 기록
+DEFAULT_FLUSH_TOKENS = 1 << 20
+
+
+def file_fingerprint(path: Optional[str], content_hash: bool = False) -> Optional[List]:
+    """파일 식별 정보 [절대 경로, 크기, 수정 시각(ns)], 없는 파일은 경로만
+
+    content_hash이면 수정 시각 대신 내용의 sha256을 쓴다 (작은 설정 파일용, touch만으로 다시 만들지 않음).
+    """
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [path]
+    if not content_hash:
+        return [path, stat.st_size, stat.st_mtime_ns]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return [path, stat.st_size, digest.hexdigest()]
+
+
+class TokenStoreWriter(TokenStreamBuilder):
+    """토큰 id를 메모리에 쌓지 않고 저장소 파일로 흘려보내는 빌더"""
+
+    def __init__(self, store_dir: str, source: Optional[Dict] = None,
+                 flush_tokens: int = DEFAULT_FLUSH_TOKENS):
+        super().__init__()
+        self.store_dir = store_dir
+        self.source = source or {}
+        self.flush_tokens = flush_tokens
+        self.flushed = 0
+
+        os.makedirs(store_dir, exist_ok=True)
+        # 이전 저장소가 있으면 완료 표시부터 지워 중간에 실패해도 재사용되지 않게 한다
+        meta_path = os.path.join(store_dir, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self._ids_file = open(os.path.join(store_dir, IDS_FILE), 'wb')
+
+    def extend(self, words):
+        super().extend(words)
+        if len(self.ids) >= self.flush_tokens:
+            self._flush()
+
+    def _flush(self):
+        self.ids.tofile(self._ids_file)
+        self.flushed += len(self.ids)
+        self.ids = array('i')
+
+    def __len__(self) -> int:
+        return self.flushed + len(self.ids)
+
+    def build(self) -> TokenStream:
+        if self.doc_offsets[-1] != len(self):
+            self.end_document("")
+        self._flush()
+        self._ids_file.close()
+
+        with open(os.path.join(self.store_dir, OFFSETS_FILE), 'wb') as f:
+            self.doc_offsets.tofile(f)
+        with open(os.path.join(self.store_dir, VOCAB_FILE), 'w', encoding='utf-8') as f:
+            for word in self.vocab:
+                f.write(word + '\n')
+
+        meta = {
+            'n_tokens': self.flushed,
+            'n_docs': len(self.doc_names),
+            'vocab_size': len(self.vocab),
+            'documents': self.doc_names,
+            'source': self.source,
+        }
+        with open(os.path.join(self.store_dir, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        logging.info(f"Token store written to {self.store_dir}: "
+                     f"{meta['n_tokens']} tokens, {meta['n_docs']} documents, {meta['vocab_size']} words")
+        return open_token_store(self.store_dir)
+
+
+def read_token_store_meta(store_dir: str) -> Optional[Dict]:
+    """완료된 저장소의 meta.json (없으면 None)"""
+    meta_path = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def token_store_matches(store_dir: str, source: Dict) -> bool:
+    """같은 조건으로 만든 완료된 저장소가 있는지 확인"""
+    meta = read_token_store_meta(store_dir)
+    return meta is not None and meta.get('source') == source
+
+
+def open_token_store(store_dir: str) -> TokenStream:
+    """저장소를 메모리 매핑된 TokenStream으로 연다 (id는 필요할 때 디스크에서 읽힘)"""
+    meta = read_token_store_meta(store_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No complete token store in {store_dir}")
+
+    with open(os.path.join(store_dir, VOCAB_FILE), 'r', encoding='utf-8') as f:
+        vocab = [line.rstrip('\n') for line in f]
+
+    if meta['n_tokens'] > 0:
+        ids = np.memmap(os.path.join(store_dir, IDS_FILE), dtype=TOKEN_DTYPE, mode='r',
+                        shape=(meta['n_tokens'],))
+    else:
+        ids = np.zeros(0, dtype=TOKEN_DTYPE)
+    doc_offsets = np.fromfile(os.path.join(store_dir, OFFSETS_FILE), dtype=np.int64)
+
+    logging.info(f"Token store opened from {store_dir}: {meta['n_tokens']} tokens, {meta['n_docs']} documents")
+    return TokenStream(vocab, ids, doc_offsets, meta['documents'])
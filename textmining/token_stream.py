@@ -0,0 +1,113 @@
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# 토큰 하나당 메모리 사용량 비교 (64-bit CPython 기준)
+# - 기존 List[str]: 리스트 슬롯 8바이트 + 출현마다 새로 만들어지는 str 객체
+#   (한글 2~4글자 명사 기준 약 80~90바이트) => 토큰당 약 90바이트
+# - TokenStream: int32 id 4바이트 + 고유 단어당 어휘 테이블 1회
+#   => 1,000만 토큰 기준 약 900MB -> 약 40MB (+ 어휘 크기)
+TOKEN_DTYPE = np.int32
+
+# 디스크/메모리 스트림을 순회할 때 한 번에 읽는 토큰 수
+DEFAULT_SCAN_CHUNK = 1 << 22
+
+
+class TokenStream:
+    """어휘 테이블 + int32 id 시퀀스로 표현한 토큰 스트림
+
+    ids는 메모리 배열 또는 np.memmap(디스크 토큰 저장소)일 수 있으며,
+    doc_offsets[i]:doc_offsets[i + 1] 구간이 i번째 문서의 토큰이다.
+    """
+
+    def __init__(self, vocab: List[str], ids: np.ndarray,
+                 doc_offsets: Optional[np.ndarray] = None, doc_names: Optional[List[str]] = None):
+        self.vocab = vocab
+        self.ids = ids
+        if doc_offsets is None:
+            doc_offsets = np.array([0, len(ids)], dtype=np.int64)
+        self.doc_offsets = doc_offsets
+        self.doc_names = doc_names if doc_names is not None else []
+        self._counts: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "TokenStream":
+        """문자열 토큰 목록을 TokenStream으로 변환"""
+        builder = TokenStreamBuilder()
+        builder.extend(words)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        vocab = self.vocab
+        for token_id in self.ids:
+            yield vocab[token_id]
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_SCAN_CHUNK) -> Iterator[np.ndarray]:
+        """id 시퀀스를 복사 없이 청크(view) 단위로 순회"""
+        for start in range(0, len(self.ids), chunk_size):
+            yield self.ids[start:start + chunk_size]
+
+    def counts(self, chunk_size: int = DEFAULT_SCAN_CHUNK) -> np.ndarray:
+        """id별 출현 빈도 (청크별 bincount 합산)
+
+        스트림은 만든 뒤 바뀌지 않으므로 처음 한 번만 스캔하고 읽기 전용 배열로 캐시한다
+        (분석과 네트워크 생성이 같은 빈도를 쓰므로 디스크 저장소를 두 번 읽지 않음).
+        """
+        if self._counts is None:
+            counts = np.zeros(len(self.vocab), dtype=np.int64)
+            for chunk in self.iter_chunks(chunk_size):
+                counts += np.bincount(chunk, minlength=len(self.vocab))
+            counts.flags.writeable = False
+            self._counts = counts
+        return self._counts
+
+    def to_counter(self, min_count: int = 1, counts: Optional[np.ndarray] = None) -> Counter:
+        """빈도가 min_count 이상인 단어의 Counter"""
+        if counts is None:
+            counts = self.counts()
+        keep = np.flatnonzero(counts >= max(min_count, 1))
+        return Counter({self.vocab[i]: int(counts[i]) for i in keep})
+
+
+class TokenStreamBuilder:
+    """명사 배치를 받아 id 시퀀스로 누적"""
+
+    def __init__(self):
+        self.vocab: List[str] = []
+        self.word_to_id: Dict[str, int] = {}
+        self.ids = array('i')
+        self.doc_offsets = array('q', [0])
+        self.doc_names: List[str] = []
+
+    def extend(self, words: Iterable[str]):
+        word_to_id = self.word_to_id
+        vocab = self.vocab
+        ids = self.ids
+        for word in words:
+            token_id = word_to_id.get(word)
+            if token_id is None:
+                token_id = len(vocab)
+                word_to_id[word] = token_id
+                vocab.append(word)
+            ids.append(token_id)
+
+    def end_document(self, name: str):
+        """현재까지 추가된 토큰을 하나의 문서로 마감"""
+        self.doc_offsets.append(len(self))
+        self.doc_names.append(name)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self) -> TokenStream:
+        if self.doc_offsets[-1] != len(self):
+            self.end_document("")
+        # array 버퍼를 복사 없이 numpy 배열로 감싼다
+        ids = np.frombuffer(self.ids, dtype=TOKEN_DTYPE) if len(self.ids) else np.zeros(0, dtype=TOKEN_DTYPE)
+        doc_offsets = np.frombuffer(self.doc_offsets, dtype=np.int64)
+        return TokenStream(self.vocab, ids, doc_offsets, self.doc_names)